@@ -114,6 +114,18 @@ def create_tool_input(
 # Parse raw tool result content into typed output models (ReadOutput, EditOutput, etc.)
 # Symmetric with Tool Input parsing above.
 
+# Compiled once; these run per tool result (and per line for cat-n snippets)
+_CAT_N_LINE_PATTERN = re.compile(r"\s+(\d+)→(.*)$")
+_CAT_N_PREFIX_PATTERN = re.compile(r"\s+\d+→")
+_UNIX_PATH_PATTERN = re.compile(r"/[a-zA-Z0-9_-]+(/[a-zA-Z0-9_.-]+)*")
+_ANSWERED_QUESTIONS_PATTERN = re.compile(
+    r"User has answered your questions?: (.+)\. You can now continue",
+    re.DOTALL,
+)
+_QA_PAIR_PATTERN = re.compile(r'"([^"]+)"="([^"]+)"')
+_WEBSEARCH_QUERY_PATTERN = re.compile(r'Web search results for query:\s*"(.+?)"')
+_WEBSEARCH_LINKS_PATTERN = re.compile(r"Links:\s*(\[.*?\])\s*\n", re.DOTALL)
+
 
 def _parse_cat_n_snippet(
     lines: list[str], start_idx: int = 0
@@ -151,7 +163,7 @@ def _parse_cat_n_snippet(
             continue
 
         # Parse regular code line (format: "  123→content")
-        match = re.match(r"\s+(\d+)→(.*)$", line)
+        match = _CAT_N_LINE_PATTERN.match(line)
         if match:
             line_num = int(match.group(1))
             # Capture the first line number as offset
@@ -216,7 +228,7 @@ def parse_read_output(
 
     # Check if content matches the cat-n format pattern (line_number → content)
     lines = content.split("\n")
-    if not lines or not re.match(r"\s+\d+→", lines[0]):
+    if not lines or not _CAT_N_PREFIX_PATTERN.match(lines[0]):
         return None
 
     result = _parse_cat_n_snippet(lines)
@@ -264,7 +276,7 @@ def parse_edit_output(
     code_start_idx = None
 
     for i, line in enumerate(lines):
-        if re.match(r"\s+\d+→", line):
+        if _CAT_N_PREFIX_PATTERN.match(line):
             code_start_idx = i
             break
 
@@ -362,7 +374,7 @@ def _looks_like_bash_output(content: str) -> bool:
     ]
 
     # Check for file path patterns that suggest command output
-    if re.search(r"/[a-zA-Z0-9_-]+(/[a-zA-Z0-9_.-]+)*", content):  # Unix-style paths
+    if _UNIX_PATH_PATTERN.search(content):  # Unix-style paths
         return True
 
     # Check for common command output patterns
@@ -416,19 +428,14 @@ def parse_askuserquestion_output(
         return None
 
     # Extract the Q&A portion between the colon and the final sentence
-    match = re.match(
-        r"User has answered your questions?: (.+)\. You can now continue",
-        content,
-        re.DOTALL,
-    )
+    match = _ANSWERED_QUESTIONS_PATTERN.match(content)
     if not match:
         return None
 
     qa_portion = match.group(1)
 
     # Parse "Question"="Answer" pairs
-    qa_pattern = re.compile(r'"([^"]+)"="([^"]+)"')
-    pairs = qa_pattern.findall(qa_portion)
+    pairs = _QA_PAIR_PATTERN.findall(qa_portion)
 
     if not pairs:
         return None
@@ -547,14 +554,14 @@ def _parse_websearch_from_text(text: str) -> Optional[WebSearchOutput]:
         WebSearchOutput if parsing succeeds, None otherwise
     """
     # Extract query
-    query_match = re.match(r'Web search results for query:\s*"(.+?)"', text)
+    query_match = _WEBSEARCH_QUERY_PATTERN.match(text)
     if not query_match:
         return None
     query = query_match.group(1)
 
     # Extract links JSON array
     links: list[WebSearchLink] = []
-    links_match = re.search(r"Links:\s*(\[.*?\])\s*\n", text, re.DOTALL)
+    links_match = _WEBSEARCH_LINKS_PATTERN.search(text)
     if links_match:
         try:
             raw_links = json.loads(links_match.group(1))
@@ -81,6 +81,16 @@ def is_task_notification(text_content: str) -> bool:
 # Slash Command Creation
 # =============================================================================
 
+_COMMAND_NAME_PATTERN = re.compile(r"<command-name>([^<]+)</command-name>")
+_COMMAND_ARGS_PATTERN = re.compile(r"<command-args>([^<]*)</command-args>")
+_COMMAND_CONTENTS_PATTERN = re.compile(
+    r"<command-contents>(.+?)</command-contents>", re.DOTALL
+)
+_LOCAL_COMMAND_STDOUT_PATTERN = re.compile(
+    r"<local-command-stdout>(.*?)</local-command-stdout>", re.DOTALL
+)
+_MARKDOWN_HEADER_PATTERN = re.compile(r"^#+\s+", re.MULTILINE)
+
 
 def create_slash_command_message(
     meta: MessageMeta,
@@ -95,19 +105,17 @@ def create_slash_command_message(
     Returns:
         SlashCommandMessage if tags found, None otherwise
     """
-    command_name_match = re.search(r"<command-name>([^<]+)</command-name>", text)
+    command_name_match = _COMMAND_NAME_PATTERN.search(text)
     if not command_name_match:
         return None
 
     command_name = command_name_match.group(1).strip()
 
-    command_args_match = re.search(r"<command-args>([^<]*)</command-args>", text)
+    command_args_match = _COMMAND_ARGS_PATTERN.search(text)
     command_args = command_args_match.group(1).strip() if command_args_match else ""
 
     # Parse command contents, handling JSON format
-    command_contents_match = re.search(
-        r"<command-contents>(.+?)</command-contents>", text, re.DOTALL
-    )
+    command_contents_match = _COMMAND_CONTENTS_PATTERN.search(text)
     command_contents = ""
     if command_contents_match:
         contents_text = command_contents_match.group(1).strip()
@@ -144,17 +152,13 @@ def create_command_output_message(
     Returns:
         CommandOutputMessage if tags found, None otherwise
     """
-    stdout_match = re.search(
-        r"<local-command-stdout>(.*?)</local-command-stdout>",
-        text,
-        re.DOTALL,
-    )
+    stdout_match = _LOCAL_COMMAND_STDOUT_PATTERN.search(text)
     if not stdout_match:
         return None
 
     stdout_content = stdout_match.group(1).strip()
     # Check if content looks like markdown (starts with markdown headers)
-    is_markdown = bool(re.match(r"^#+\s+", stdout_content, re.MULTILINE))
+    is_markdown = bool(_MARKDOWN_HEADER_PATTERN.match(stdout_content))
 
     return CommandOutputMessage(
         stdout=stdout_content, is_markdown=is_markdown, meta=meta
@@ -165,6 +169,10 @@ def create_command_output_message(
 # Bash Input/Output Creation
 # =============================================================================
 
+_BASH_INPUT_PATTERN = re.compile(r"<bash-input>(.*?)</bash-input>", re.DOTALL)
+_BASH_STDOUT_PATTERN = re.compile(r"<bash-stdout>(.*?)</bash-stdout>", re.DOTALL)
+_BASH_STDERR_PATTERN = re.compile(r"<bash-stderr>(.*?)</bash-stderr>", re.DOTALL)
+
 
 def create_bash_input_message(
     meta: MessageMeta,
@@ -179,7 +187,7 @@ def create_bash_input_message(
     Returns:
         BashInputMessage if tags found, None otherwise
     """
-    bash_match = re.search(r"<bash-input>(.*?)</bash-input>", text, re.DOTALL)
+    bash_match = _BASH_INPUT_PATTERN.search(text)
     if not bash_match:
         return None
 
@@ -199,8 +207,8 @@ def create_bash_output_message(
     Returns:
         BashOutputMessage if tags found, None otherwise
     """
-    stdout_match = re.search(r"<bash-stdout>(.*?)</bash-stdout>", text, re.DOTALL)
-    stderr_match = re.search(r"<bash-stderr>(.*?)</bash-stderr>", text, re.DOTALL)
+    stdout_match = _BASH_STDOUT_PATTERN.search(text)
+    stderr_match = _BASH_STDERR_PATTERN.search(text)
 
     if not stdout_match and not stderr_match:
         return None
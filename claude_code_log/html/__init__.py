@@ -46,8 +46,10 @@ from .tool_formatters import (
 )
 from .system_formatters import (
     format_hook_summary_content,
+    format_hook_summary_content_into,
     format_session_header_content,
     format_system_content,
+    format_system_content_batch,
 )
 from ..models import (
     AssistantTextMessage,
@@ -130,8 +132,10 @@ __all__ = [
     "render_params_table",
     # system_formatters
     "format_hook_summary_content",
+    "format_hook_summary_content_into",
     "format_session_header_content",
     "format_system_content",
+    "format_system_content_batch",
     # system content models
     "SessionHeaderMessage",
     # user_formatters (content models)
@@ -5,9 +5,77 @@ This module provides utilities for converting terminal ANSI escape codes
 to HTML with appropriate CSS classes for styling.
 """
 
-import html
-import re
-from typing import Any
+# HTML escaping and CR -> LF normalization fused into one translate table so
+# escaping is a single C-level pass (plus one replace for CRLF pairs)
+_ESC_TABLE = {
+    ord("&"): "&amp;",
+    ord("<"): "&lt;",
+    ord(">"): "&gt;",
+    ord('"'): "&quot;",
+    ord("'"): "&#x27;",
+    ord("\r"): "\n",
+}
+
+_COLOR_NAMES = ("black", "red", "green", "yellow", "blue", "magenta", "cyan", "white")
+
+# SGR code → CSS class lookup tables (standard 30-37/40-47, bright 90-97/100-107)
+_FG_MAP = {str(30 + i): f"ansi-{name}" for i, name in enumerate(_COLOR_NAMES)} | {
+    str(90 + i): f"ansi-bright-{name}" for i, name in enumerate(_COLOR_NAMES)
+}
+_BG_MAP = {str(40 + i): f"ansi-bg-{name}" for i, name in enumerate(_COLOR_NAMES)} | {
+    str(100 + i): f"ansi-bg-bright-{name}" for i, name in enumerate(_COLOR_NAMES)
+}
+
+# Style flag bits packed into a single int per segment
+_BOLD = 1
+_DIM = 2
+_ITALIC = 4
+_UNDERLINE = 8
+
+# Memoized <span ...> openers keyed by style tuple: terminal output cycles
+# through a handful of styles, so most segments hit the cache. "" means the
+# segment is unstyled and needs no wrapping span.
+_span_open_cache: dict[
+    tuple[str | None, str | None, int, str | None, str | None], str
+] = {}
+
+
+def _span_open(
+    fg: str | None, bg: str | None, flags: int, rgb_fg: str | None, rgb_bg: str | None
+) -> str:
+    """Build (or fetch) the opening span tag for a style tuple."""
+    classes: list[str] = []
+    styles: list[str] = []
+
+    if fg:
+        classes.append(fg)
+    if bg:
+        classes.append(bg)
+    if flags & _BOLD:
+        classes.append("ansi-bold")
+    if flags & _DIM:
+        classes.append("ansi-dim")
+    if flags & _ITALIC:
+        classes.append("ansi-italic")
+    if flags & _UNDERLINE:
+        classes.append("ansi-underline")
+    if rgb_fg:
+        styles.append(rgb_fg)
+    if rgb_bg:
+        styles.append(rgb_bg)
+
+    if classes or styles:
+        attrs: list[str] = []
+        if classes:
+            attrs.append(f'class="{" ".join(classes)}"')
+        if styles:
+            attrs.append(f'style="{"; ".join(styles)}"')
+        opener = f"<span {' '.join(attrs)}>"
+    else:
+        opener = ""
+
+    _span_open_cache[(fg, bg, flags, rgb_fg, rgb_bg)] = opener
+    return opener
 
 
 def _escape_html(text: str) -> str:
@@ -15,9 +83,9 @@ def _escape_html(text: str) -> str:
 
     Also normalizes line endings (CRLF -> LF) to prevent double spacing in <pre> blocks.
     """
-    # Normalize CRLF to LF to prevent double line breaks in HTML
-    normalized = text.replace("\r\n", "\n").replace("\r", "\n")
-    return html.escape(normalized)
+    # Collapse CRLF pairs first so the table's \r -> \n mapping doesn't double
+    # newlines, then escape and normalize in one translate pass
+    return text.replace("\r\n", "\n").translate(_ESC_TABLE)
 
 
 def convert_ansi_to_html(text: str) -> str:
@@ -30,66 +98,132 @@ def convert_ansi_to_html(text: str) -> str:
     - Reset (0, 39, 49, 22, 23, 24)
     - Strips cursor movement and screen manipulation codes
     """
-    # First, strip cursor movement and screen manipulation codes
-    # Common patterns: [1A (cursor up), [2K (erase line), [?25l (hide cursor), etc.
-    cursor_patterns = [
-        r"\x1b\[[0-9]*[ABCD]",  # Cursor movement (up, down, forward, back)
-        r"\x1b\[[0-9]*[EF]",  # Cursor next/previous line
-        r"\x1b\[[0-9]*[GH]",  # Cursor horizontal/home position
-        r"\x1b\[[0-9;]*[Hf]",  # Cursor position
-        r"\x1b\[[0-9]*[JK]",  # Erase display/line
-        r"\x1b\[[0-9]*[ST]",  # Scroll up/down
-        r"\x1b\[\?[0-9]*[hl]",  # Private mode set/reset (show/hide cursor, etc.)
-        r"\x1b\[[0-9]*[PXYZ@]",  # Insert/delete operations
-        r"\x1b\[=[0-9]*[A-Za-z]",  # Alternate character set
-        r"\x1b\][0-9];[^\x07]*\x07",  # Operating System Command (OSC)
-        r"\x1b\][0-9];[^\x1b]*\x1b\\",  # OSC with string terminator
-    ]
-
-    # Strip all cursor movement and screen manipulation codes
-    for pattern in cursor_patterns:
-        text = re.sub(pattern, "", text)
-
-    # Also strip any remaining unhandled escape sequences that aren't color codes
-    # This catches any we might have missed, but preserves \x1b[...m color codes
-    text = re.sub(r"\x1b\[(?![0-9;]*m)[0-9;]*[A-Za-z]", "", text)
+    # Fast path: most tool output contains no escape sequences at all, so a
+    # single C-level scan avoids walking the string for sequences at all.
+    if "\x1b" not in text and "\x9b" not in text:
+        return _escape_html(text)
 
+    n = len(text)
     result: list[str] = []
-    segments: list[dict[str, Any]] = []
-
-    # First pass: split text into segments with their styles
-    last_end = 0
-    current_fg = None
-    current_bg = None
-    current_bold = False
-    current_dim = False
-    current_italic = False
-    current_underline = False
-    current_rgb_fg = None
-    current_rgb_bg = None
-
-    for match in re.finditer(r"\x1b\[([0-9;]*)m", text):
-        # Add text before this escape code
-        if match.start() > last_end:
-            segments.append(
-                {
-                    "text": text[last_end : match.start()],
-                    "fg": current_fg,
-                    "bg": current_bg,
-                    "bold": current_bold,
-                    "dim": current_dim,
-                    "italic": current_italic,
-                    "underline": current_underline,
-                    "rgb_fg": current_rgb_fg,
-                    "rgb_bg": current_rgb_bg,
-                }
+    # Segments as (text, fg, bg, flags, rgb_fg, rgb_bg) tuples: much lighter
+    # than a 9-key dict per segment, and styles compare as a single tuple
+    segments: list[tuple[str, str | None, str | None, int, str | None, str | None]] = []
+    # Text pieces accumulated under the current style; flushed into a segment
+    # whenever an SGR sequence changes the style. Stripped cursor/OSC codes
+    # just fall out of the scan without breaking the run.
+    pending: list[str] = []
+
+    # Single pass: locate each escape with str.find (a C-level scan), parse the
+    # sequence in place, and either apply it (SGR), drop it (cursor/screen
+    # manipulation, OSC), or keep it as literal text (anything unrecognized).
+    pos = 0
+    saw_sgr = False
+    find = text.find  # bound method: skips the attribute lookup per iteration
+    current_fg: str | None = None
+    current_bg: str | None = None
+    current_flags = 0
+    current_rgb_fg: str | None = None
+    current_rgb_bg: str | None = None
+
+    while True:
+        esc = find("\x1b", pos)
+        if esc < 0:
+            if pos < n:
+                pending.append(text[pos:])
+            break
+        if esc > pos:
+            pending.append(text[pos:esc])
+        pos = esc + 1
+
+        kind = text[pos] if pos < n else ""
+
+        if kind == "]":
+            # Operating System Command: \x1b]N;...<BEL> or \x1b]N;...\x1b\\
+            if pos + 2 < n and text[pos + 1].isdigit() and text[pos + 2] == ";":
+                bel = find("\x07", pos + 3)
+                if bel >= 0:
+                    pos = bel + 1
+                    continue
+                st = find("\x1b", pos + 3)
+                if st >= 0 and text[st : st + 2] == "\x1b\\":
+                    pos = st + 2
+                    continue
+            # Unterminated/malformed OSC: keep the ESC as literal text
+            pending.append("\x1b")
+            continue
+
+        if kind != "[":
+            # Bare ESC or a non-CSI sequence: keep as literal text
+            pending.append("\x1b")
+            continue
+
+        # CSI sequence: optional private prefix, numeric params, final byte
+        j = pos + 1
+        prefix = text[j] if j < n else ""
+        if prefix == "?" or prefix == "=":
+            j += 1
+        params_start = j
+        while j < n and (text[j].isdigit() or text[j] == ";"):
+            j += 1
+        params = text[params_start:j]
+        final = text[j] if j < n else ""
+
+        if prefix == "?":
+            # Private mode set/reset (show/hide cursor, etc.) — strip
+            if final in ("h", "l") and ";" not in params:
+                pos = j + 1
+            else:
+                pending.append("\x1b")
+            continue
+        if prefix == "=":
+            # Alternate character set — strip
+            if final.isalpha() and ";" not in params:
+                pos = j + 1
+            else:
+                pending.append("\x1b")
+            continue
+
+        if final != "m":
+            # Cursor movement, erase, scroll, insert/delete, or any other
+            # non-color sequence — strip it
+            if final.isalpha() or (final == "@" and ";" not in params):
+                pos = j + 1
+            else:
+                pending.append("\x1b")
+            continue
+
+        # SGR (color/style) sequence: flush the pending run under the old
+        # style, coalescing with the previous segment when the style matches
+        # (common after no-op resets)
+        saw_sgr = True
+        pos = j + 1
+        if pending:
+            segment = (
+                "".join(pending),
+                current_fg,
+                current_bg,
+                current_flags,
+                current_rgb_fg,
+                current_rgb_bg,
             )
+            pending.clear()
+            if segments and segments[-1][1:] == segment[1:]:
+                segments[-1] = (segments[-1][0] + segment[0], *segment[1:])
+            else:
+                segments.append(segment)
+
+        # Fast path: a plain reset (\x1b[0m or \x1b[m) is the single most
+        # common SGR sequence; handle it without the split/dispatch loop
+        if params == "" or params == "0":
+            current_fg = None
+            current_bg = None
+            current_flags = 0
+            current_rgb_fg = None
+            current_rgb_bg = None
+            continue
 
         # Process escape codes (empty params = reset, same as code 0)
-        code_blob = match.group(1)
-        codes = code_blob.split(";") if code_blob else ["0"]
-        if codes == [""]:
-            codes = ["0"]
+        codes = params.split(";") if params else ["0"]
         i = 0
         while i < len(codes):
             code = codes[i]
@@ -98,10 +232,7 @@ def convert_ansi_to_html(text: str) -> str:
             if code == "0":
                 current_fg = None
                 current_bg = None
-                current_bold = False
-                current_dim = False
-                current_italic = False
-                current_underline = False
+                current_flags = 0
                 current_rgb_fg = None
                 current_rgb_bg = None
             elif code == "39":
@@ -111,81 +242,28 @@ def convert_ansi_to_html(text: str) -> str:
                 current_bg = None
                 current_rgb_bg = None
             elif code == "22":
-                current_bold = False
-                current_dim = False
+                current_flags &= ~(_BOLD | _DIM)
             elif code == "23":
-                current_italic = False
+                current_flags &= ~_ITALIC
             elif code == "24":
-                current_underline = False
+                current_flags &= ~_UNDERLINE
 
             # Style codes
             elif code == "1":
-                current_bold = True
+                current_flags |= _BOLD
             elif code == "2":
-                current_dim = True
+                current_flags |= _DIM
             elif code == "3":
-                current_italic = True
+                current_flags |= _ITALIC
             elif code == "4":
-                current_underline = True
-
-            # Standard foreground colors
-            elif code in ["30", "31", "32", "33", "34", "35", "36", "37"]:
-                color_map = {
-                    "30": "black",
-                    "31": "red",
-                    "32": "green",
-                    "33": "yellow",
-                    "34": "blue",
-                    "35": "magenta",
-                    "36": "cyan",
-                    "37": "white",
-                }
-                current_fg = f"ansi-{color_map[code]}"
-                current_rgb_fg = None
-
-            # Standard background colors
-            elif code in ["40", "41", "42", "43", "44", "45", "46", "47"]:
-                color_map = {
-                    "40": "black",
-                    "41": "red",
-                    "42": "green",
-                    "43": "yellow",
-                    "44": "blue",
-                    "45": "magenta",
-                    "46": "cyan",
-                    "47": "white",
-                }
-                current_bg = f"ansi-bg-{color_map[code]}"
-                current_rgb_bg = None
+                current_flags |= _UNDERLINE
 
-            # Bright foreground colors
-            elif code in ["90", "91", "92", "93", "94", "95", "96", "97"]:
-                color_map = {
-                    "90": "bright-black",
-                    "91": "bright-red",
-                    "92": "bright-green",
-                    "93": "bright-yellow",
-                    "94": "bright-blue",
-                    "95": "bright-magenta",
-                    "96": "bright-cyan",
-                    "97": "bright-white",
-                }
-                current_fg = f"ansi-{color_map[code]}"
+            # Standard and bright foreground/background colors
+            elif (fg := _FG_MAP.get(code)) is not None:
+                current_fg = fg
                 current_rgb_fg = None
-
-            # Bright background colors
-            elif code in ["100", "101", "102", "103", "104", "105", "106", "107"]:
-                color_map = {
-                    "100": "bright-black",
-                    "101": "bright-red",
-                    "102": "bright-green",
-                    "103": "bright-yellow",
-                    "104": "bright-blue",
-                    "105": "bright-magenta",
-                    "106": "bright-cyan",
-                    "107": "bright-white",
-                }
-                current_bg = f"ansi-bg-{color_map[code]}"
+            elif (bg := _BG_MAP.get(code)) is not None:
+                current_bg = bg
                 current_rgb_bg = None
 
             # RGB foreground color
@@ -210,58 +288,42 @@ def convert_ansi_to_html(text: str) -> str:
 
             i += 1
 
-        last_end = match.end()
+    # No SGR codes at all (only stripped cursor codes): the whole string is one
+    # plain segment, so skip the span-building machinery entirely.
+    if not saw_sgr:
+        return _escape_html("".join(pending))
 
     # Add remaining text
-    if last_end < len(text):
-        segments.append(
-            {
-                "text": text[last_end:],
-                "fg": current_fg,
-                "bg": current_bg,
-                "bold": current_bold,
-                "dim": current_dim,
-                "italic": current_italic,
-                "underline": current_underline,
-                "rgb_fg": current_rgb_fg,
-                "rgb_bg": current_rgb_bg,
-            }
+    if pending:
+        segment = (
+            "".join(pending),
+            current_fg,
+            current_bg,
+            current_flags,
+            current_rgb_fg,
+            current_rgb_bg,
         )
+        if segments and segments[-1][1:] == segment[1:]:
+            segments[-1] = (segments[-1][0] + segment[0], *segment[1:])
+        else:
+            segments.append(segment)
 
     # Second pass: build HTML
-    for segment in segments:
-        if not segment["text"]:
+    cache_get = _span_open_cache.get
+    for seg_text, fg, bg, flags, rgb_fg, rgb_bg in segments:
+        if not seg_text:
             continue
 
-        classes: list[str] = []
-        styles: list[str] = []
-
-        if segment["fg"]:
-            classes.append(segment["fg"])
-        if segment["bg"]:
-            classes.append(segment["bg"])
-        if segment["bold"]:
-            classes.append("ansi-bold")
-        if segment["dim"]:
-            classes.append("ansi-dim")
-        if segment["italic"]:
-            classes.append("ansi-italic")
-        if segment["underline"]:
-            classes.append("ansi-underline")
-        if segment["rgb_fg"]:
-            styles.append(segment["rgb_fg"])
-        if segment["rgb_bg"]:
-            styles.append(segment["rgb_bg"])
-
-        escaped_text = _escape_html(segment["text"])
-
-        if classes or styles:
-            attrs: list[str] = []
-            if classes:
-                attrs.append(f'class="{" ".join(classes)}"')
-            if styles:
-                attrs.append(f'style="{"; ".join(styles)}"')
-            result.append(f"<span {' '.join(attrs)}>{escaped_text}</span>")
+        opener = cache_get((fg, bg, flags, rgb_fg, rgb_bg))
+        if opener is None:
+            opener = _span_open(fg, bg, flags, rgb_fg, rgb_bg)
+
+        escaped_text = _escape_html(seg_text)
+
+        if opener:
+            result.append(opener)
+            result.append(escaped_text)
+            result.append("</span>")
         else:
             result.append(escaped_text)
 
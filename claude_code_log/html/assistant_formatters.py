@@ -54,18 +54,30 @@ def format_assistant_text_content(
     """
     formatter = image_formatter or format_image_content
     parts: list[str] = []
+    # Consecutive text items are joined and rendered as one markdown document:
+    # the parser setup dominates for small fragments, so one parse beats N
+    text_run: list[str] = []
+
+    def flush_text_run() -> None:
+        if text_run:
+            parts.append(
+                render_markdown_collapsible(
+                    "\n\n".join(text_run),
+                    "assistant-text",
+                    line_threshold=line_threshold,
+                    preview_line_count=preview_line_count,
+                )
+            )
+            text_run.clear()
+
     for item in content.items:
         if isinstance(item, ImageContent):
+            flush_text_run()
             parts.append(formatter(item))
         else:  # TextContent
             if item.text.strip():
-                text_html = render_markdown_collapsible(
-                    item.text,
-                    "assistant-text",
-                    line_threshold=line_threshold,
-                    preview_line_count=preview_line_count,
-                )
-                parts.append(text_html)
+                text_run.append(item.text)
+    flush_text_run()
     return "\n".join(parts)
 
 
@@ -108,7 +120,8 @@ def format_image_content(image: ImageContent) -> str:
     src = export_image(image, mode="embedded")
     if src is None:
         return "[Image]"
-    return f'<img src="{src}" alt="image" class="uploaded-image" />'
+    # Concatenate rather than f-string: src can be a multi-MB data URL
+    return '<img src="' + src + '" alt="image" class="uploaded-image" />'
 
 
 def format_unknown_content(content: UnknownMessage) -> str:
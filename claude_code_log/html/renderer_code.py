@@ -7,7 +7,7 @@ This module provides utilities for rendering source code with syntax highlightin
 
 import difflib
 import fnmatch
-import html
+import functools
 import os
 import re
 from typing import Callable, Optional
@@ -22,18 +22,37 @@ from pygments.util import ClassNotFound
 from ..renderer_timings import timing_stat
 
 
+# HTML escaping and CR -> LF normalization fused into one translate table so
+# escaping is a single C-level pass (plus one replace for CRLF pairs)
+_ESC_TABLE = {
+    ord("&"): "&amp;",
+    ord("<"): "&lt;",
+    ord(">"): "&gt;",
+    ord('"'): "&quot;",
+    ord("'"): "&#x27;",
+    ord("\r"): "\n",
+}
+
+
 def _escape_html(text: str) -> str:
     """Escape HTML special characters in text.
 
     Also normalizes line endings (CRLF -> LF) to prevent double spacing in <pre> blocks.
     """
-    normalized = text.replace("\r\n", "\n").replace("\r", "\n")
-    return html.escape(normalized)
+    return text.replace("\r\n", "\n").translate(_ESC_TABLE)
 
 
-# Cache for Pygments lexer pattern matching
+# Above this combined line length, skip character-level diffing and mark
+# whole lines (SequenceMatcher is quadratic in line length)
+_CHAR_DIFF_MAX_CHARS = 4096
+
+# Caches for Pygments lexer pattern matching, built eagerly at import (below)
 _pattern_cache: Optional[dict[str, str]] = None
 _extension_cache: Optional[dict[str, str]] = None
+# All filename patterns fused into one alternation; _pattern_aliases[group - 1]
+# maps the matching group back to its lexer alias
+_pattern_regex: Optional[re.Pattern[str]] = None
+_pattern_aliases: list[str] = []
 
 
 def _init_lexer_caches() -> tuple[dict[str, str], dict[str, str]]:
@@ -42,7 +61,7 @@ def _init_lexer_caches() -> tuple[dict[str, str], dict[str, str]]:
     Returns:
         Tuple of (pattern_cache, extension_cache)
     """
-    global _pattern_cache, _extension_cache
+    global _pattern_cache, _extension_cache, _pattern_regex, _pattern_aliases
 
     if _pattern_cache is not None and _extension_cache is not None:
         return _pattern_cache, _extension_cache
@@ -70,11 +89,41 @@ def _init_lexer_caches() -> tuple[dict[str, str], dict[str, str]]:
                     if ext not in extension_cache:
                         extension_cache[ext] = lexer_alias
 
+    # Fuse every filename pattern into one compiled alternation so fallback
+    # lookup is a single regex match instead of ~900 fnmatch calls. Each
+    # branch is one capturing group; the first matching branch wins, same as
+    # iterating the patterns in order.
+    _pattern_aliases = list(pattern_cache.values())
+    _pattern_regex = re.compile(
+        "|".join(f"({fnmatch.translate(p)})" for p in pattern_cache)
+    )
+
     _pattern_cache = pattern_cache
     _extension_cache = extension_cache
     return pattern_cache, extension_cache
 
 
+# Shared fallback lexer: plain text needs no per-call construction
+_TEXT_LEXER = TextLexer()
+
+
+@functools.lru_cache(maxsize=128)
+def _get_lexer(alias: str) -> Lexer:
+    """Get a lexer by alias, reusing instances across code blocks."""
+    return get_lexer_by_name(alias, stripall=False)
+
+
+@functools.lru_cache(maxsize=64)
+def _get_formatter(show_linenos: bool, linenostart: int) -> Formatter:
+    """Get an HtmlFormatter, reusing instances for repeated option combos."""
+    return HtmlFormatter(
+        linenos="table" if show_linenos else False,
+        cssclass="highlight",
+        wrapcode=True,
+        linenostart=linenostart,
+    )
+
+
 def highlight_code_with_pygments(
     code: str, file_path: str, show_linenos: bool = True, linenostart: int = 1
 ) -> str:
@@ -89,50 +138,83 @@ def highlight_code_with_pygments(
     Returns:
         HTML string with syntax-highlighted code
     """
-    # Get caches (initialized lazily)
-    pattern_cache, extension_cache = _init_lexer_caches()
+    # Get caches (built eagerly at import; this is a no-op lookup)
+    _, extension_cache = _init_lexer_caches()
 
     # Get basename for matching (patterns are like "*.py")
     basename = os.path.basename(file_path).lower()
 
     # Default to plain text lexer
-    lexer: Lexer = TextLexer()
+    lexer: Lexer = _TEXT_LEXER
 
     try:
-        # OPTIMIZATION: Try fast extension lookup first (O(1) dict lookup)
+        # OPTIMIZATION: Try fast extension lookup first (O(1) dict lookup).
+        # rfind extracts the last extension (handles .tar.gz, etc.) without
+        # allocating a list of every dotted component.
         lexer_alias = None
-        if "." in basename:
-            ext = basename.split(".")[-1]  # Get last extension (handles .tar.gz, etc.)
-            lexer_alias = extension_cache.get(ext)
-
-        # Fall back to pattern matching only if extension lookup failed
-        if lexer_alias is None:
-            for pattern, lex_alias in pattern_cache.items():
-                if fnmatch.fnmatch(basename, pattern):
-                    lexer_alias = lex_alias
-                    break
-
-        # Get lexer based on file extension
+        dot = basename.rfind(".")
+        if dot >= 0:
+            lexer_alias = extension_cache.get(basename[dot + 1 :])
+
+        # Fall back to pattern matching only if extension lookup failed:
+        # one match against the fused alternation instead of a linear
+        # fnmatch scan over every known pattern
+        if lexer_alias is None and _pattern_regex is not None:
+            match = _pattern_regex.match(basename)
+            if match and match.lastindex:
+                lexer_alias = _pattern_aliases[match.lastindex - 1]
+
+        # Get lexer based on file extension (memoized; a transcript with 50
+        # Python blocks constructs one lexer, not 50)
         # Note: stripall=False preserves leading whitespace (important for code indentation)
         if lexer_alias:
-            lexer = get_lexer_by_name(lexer_alias, stripall=False)
+            lexer = _get_lexer(lexer_alias)
     except ClassNotFound:
         # Fall back to plain text lexer (already set as default)
         pass
 
-    # Create formatter with line numbers in table format
-    formatter: Formatter = HtmlFormatter(
-        linenos="table" if show_linenos else False,
-        cssclass="highlight",
-        wrapcode=True,
-        linenostart=linenostart,
-    )
+    # Formatter with line numbers in table format (memoized per option combo)
+    formatter = _get_formatter(show_linenos, linenostart)
 
     # Highlight the code with timing if enabled
     with timing_stat("_pygments_timings"):
         return str(highlight(code, lexer, formatter))
 
 
+def _truncate_pre_block(
+    html_str: str, open_prefix: str, close_tag: str, max_lines: int
+) -> str:
+    """Truncate the content of one <pre> block to max_lines lines.
+
+    Locates the block with str.find (open_prefix runs up to but not including
+    the tag's closing '>', so it also matches <pre> tags with attributes) and
+    cuts the content at the max_lines-th newline. Returns the input unchanged
+    if the block isn't found or is already short enough.
+    """
+    start = html_str.find(open_prefix)
+    if start < 0:
+        return html_str
+    content_start = html_str.find(">", start + len(open_prefix))
+    if content_start < 0:
+        return html_str
+    content_start += 1
+    end = html_str.find(close_tag, content_start)
+    if end < 0:
+        return html_str
+
+    # Advance past max_lines newlines within the content
+    cut = content_start
+    for _ in range(max_lines):
+        nl = html_str.find("\n", cut, end)
+        if nl < 0:
+            # Fewer lines than max_lines; nothing to truncate
+            return html_str
+        cut = nl + 1
+
+    # Drop everything from the max_lines-th newline to the closing tag
+    return html_str[: cut - 1] + html_str[end:]
+
+
 def truncate_highlighted_preview(highlighted_html: str, max_lines: int) -> str:
     """Truncate Pygments highlighted HTML to first N lines.
 
@@ -140,7 +222,9 @@ def truncate_highlighted_preview(highlighted_html: str, max_lines: int) -> str:
       <td class="linenos"><div class="linenodiv"><pre>LINE_NUMS</pre></div></td>
       <td class="code"><div><pre>CODE</pre></div></td>
 
-    We truncate content within each <pre> tag to the first max_lines lines.
+    We truncate content within each <pre> tag to the first max_lines lines
+    using direct string scanning, which avoids walking the whole document
+    with a DOTALL regex.
 
     Args:
         highlighted_html: Full Pygments-highlighted HTML
@@ -149,28 +233,14 @@ def truncate_highlighted_preview(highlighted_html: str, max_lines: int) -> str:
     Returns:
         Truncated HTML with same structure but fewer lines
     """
-
-    def truncate_pre_content(match: re.Match[str]) -> str:
-        """Truncate content inside a <pre> tag to max_lines."""
-        prefix, content, suffix = match.groups()
-        lines = content.split("\n")
-        truncated = "\n".join(lines[:max_lines])
-        return prefix + truncated + suffix
-
     # Truncate linenos <pre> content (line numbers separated by newlines)
-    result = re.sub(
-        r'(<div class="linenodiv"><pre>)(.*?)(</pre></div>)',
-        truncate_pre_content,
-        highlighted_html,
-        flags=re.DOTALL,
+    result = _truncate_pre_block(
+        highlighted_html, '<div class="linenodiv"><pre', "</pre></div>", max_lines
     )
 
     # Truncate code <pre> content
-    result = re.sub(
-        r'(<td class="code"><div><pre[^>]*>)(.*?)(</pre></div></td>)',
-        truncate_pre_content,
-        result,
-        flags=re.DOTALL,
+    result = _truncate_pre_block(
+        result, '<td class="code"><div><pre', "</pre></div></td>", max_lines
     )
 
     return result
@@ -192,15 +262,39 @@ def render_line_diff(
     if escape_fn is None:
         escape_fn = _escape_html
 
-    # Use SequenceMatcher for character-level diff
-    sm = difflib.SequenceMatcher(None, old_line.rstrip("\n"), new_line.rstrip("\n"))
+    old_line = old_line.rstrip("\n")
+    new_line = new_line.rstrip("\n")
+
+    # Identical lines need no character-level matching at all
+    if old_line == new_line:
+        escaped = escape_fn(old_line)
+        return (
+            f"<div class='diff-line diff-removed'><span class='diff-marker'>-</span>{escaped}</div>"
+            f"<div class='diff-line diff-added'><span class='diff-marker'>+</span>{escaped}</div>"
+        )
+
+    # Character-level matching is quadratic; for very long lines mark the
+    # whole line instead of burning time on intra-line detail
+    if len(old_line) + len(new_line) > _CHAR_DIFF_MAX_CHARS:
+        return (
+            f"<div class='diff-line diff-removed'><span class='diff-marker'>-</span>"
+            f"<mark class='diff-char-removed'>{escape_fn(old_line)}</mark></div>"
+            f"<div class='diff-line diff-added'><span class='diff-marker'>+</span>"
+            f"<mark class='diff-char-added'>{escape_fn(new_line)}</mark></div>"
+        )
+
+    # Use SequenceMatcher for character-level diff. autojunk would mark
+    # characters popular in the line (whitespace, punctuation) as junk, which
+    # both degrades the diff quality on source code and costs time.
+    sm = difflib.SequenceMatcher(None, old_line, new_line, autojunk=False)
+    opcodes = sm.get_opcodes()
 
     # Build old line with highlighting
     old_parts: list[str] = []
     old_parts.append(
         "<div class='diff-line diff-removed'><span class='diff-marker'>-</span>"
     )
-    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+    for tag, i1, i2, j1, j2 in opcodes:
         chunk = old_line[i1:i2]
         if tag == "equal":
             old_parts.append(escape_fn(chunk))
@@ -215,7 +309,7 @@ def render_line_diff(
     new_parts.append(
         "<div class='diff-line diff-added'><span class='diff-marker'>+</span>"
     )
-    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+    for tag, i1, i2, j1, j2 in opcodes:
         chunk = new_line[j1:j2]
         if tag == "equal":
             new_parts.append(escape_fn(chunk))
@@ -242,92 +336,84 @@ def render_single_diff(
     if escape_fn is None:
         escape_fn = _escape_html
 
+    # Fast paths for trivial inputs: identical content renders as pure
+    # context, and new-file / deleted-file edits are all-added or
+    # all-removed — no sequence matching needed for any of them
+    if old_string == new_string or not old_string or not new_string:
+        if old_string == new_string:
+            marker, css, content = " ", "diff-context", old_string
+        elif not old_string:
+            marker, css, content = "+", "diff-added", new_string
+        else:
+            marker, css, content = "-", "diff-removed", old_string
+
+        html_parts = ["<div class='edit-diff'>"]
+        for line in content.splitlines(keepends=True):
+            escaped = escape_fn(line.rstrip("\n"))
+            html_parts.append(
+                f"<div class='diff-line {css}'><span class='diff-marker'>{marker}</span>{escaped}</div>"
+            )
+        html_parts.append("</div>")
+        return "".join(html_parts)
+
     # Split into lines for diff
     old_lines = old_string.splitlines(keepends=True)
     new_lines = new_string.splitlines(keepends=True)
 
-    # Generate unified diff to identify changed lines
-    differ = difflib.Differ()
-    diff: list[str] = list(differ.compare(old_lines, new_lines))
+    # Line-level opcodes directly identify changed regions — no prefix parsing
+    # or '? ' hint skipping like Differ output would need, and no per-line
+    # string comparison overhead in Python
+    sm = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
 
     html_parts = ["<div class='edit-diff'>"]
+    # Bind append once: the method lookup is otherwise repeated per line
+    append = html_parts.append
 
-    i = 0
-    while i < len(diff):
-        line = diff[i]
-        prefix = line[0:2]
-        content = line[2:]
-
-        if prefix == "- ":
-            # Removed line - look ahead for corresponding addition
-            removed_lines: list[str] = [content]
-            j = i + 1
-
-            # Collect consecutive removed lines
-            while j < len(diff) and diff[j].startswith("- "):
-                removed_lines.append(diff[j][2:])
-                j += 1
-
-            # Skip '? ' hint lines
-            while j < len(diff) and diff[j].startswith("? "):
-                j += 1
-
-            # Collect consecutive added lines
-            added_lines: list[str] = []
-            while j < len(diff) and diff[j].startswith("+ "):
-                added_lines.append(diff[j][2:])
-                j += 1
-
-            # Skip '? ' hint lines
-            while j < len(diff) and diff[j].startswith("? "):
-                j += 1
+    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+        if tag == "equal":
+            # Unchanged lines - show for context
+            for line in old_lines[i1:i2]:
+                escaped = escape_fn(line.rstrip("\n"))
+                append(
+                    f"<div class='diff-line diff-context'><span class='diff-marker'> </span>{escaped}</div>"
+                )
+        elif tag == "replace":
+            removed_lines = old_lines[i1:i2]
+            added_lines = new_lines[j1:j2]
 
             # Generate character-level diff for paired lines
-            if added_lines:
-                for old_line, new_line in zip(removed_lines, added_lines):
-                    html_parts.append(render_line_diff(old_line, new_line, escape_fn))
-
-                # Handle any unpaired lines
-                for old_line in removed_lines[len(added_lines) :]:
-                    escaped = escape_fn(old_line.rstrip("\n"))
-                    html_parts.append(
-                        f"<div class='diff-line diff-removed'><span class='diff-marker'>-</span>{escaped}</div>"
-                    )
-
-                for new_line in added_lines[len(removed_lines) :]:
-                    escaped = escape_fn(new_line.rstrip("\n"))
-                    html_parts.append(
-                        f"<div class='diff-line diff-added'><span class='diff-marker'>+</span>{escaped}</div>"
-                    )
-            else:
-                # No corresponding addition - just removed
-                for old_line in removed_lines:
-                    escaped = escape_fn(old_line.rstrip("\n"))
-                    html_parts.append(
-                        f"<div class='diff-line diff-removed'><span class='diff-marker'>-</span>{escaped}</div>"
-                    )
-
-            i = j
-
-        elif prefix == "+ ":
-            # Added line without corresponding removal
-            escaped = escape_fn(content.rstrip("\n"))
-            html_parts.append(
-                f"<div class='diff-line diff-added'><span class='diff-marker'>+</span>{escaped}</div>"
-            )
-            i += 1
-
-        elif prefix == "? ":
-            # Skip hint lines (already processed)
-            i += 1
-
-        else:
-            # Unchanged line - show for context
-            escaped = escape_fn(content.rstrip("\n"))
-            html_parts.append(
-                f"<div class='diff-line diff-context'><span class='diff-marker'> </span>{escaped}</div>"
-            )
-            i += 1
+            for old_line, new_line in zip(removed_lines, added_lines):
+                append(render_line_diff(old_line, new_line, escape_fn))
+
+            # Handle any unpaired lines
+            for old_line in removed_lines[len(added_lines) :]:
+                escaped = escape_fn(old_line.rstrip("\n"))
+                append(
+                    f"<div class='diff-line diff-removed'><span class='diff-marker'>-</span>{escaped}</div>"
+                )
+            for new_line in added_lines[len(removed_lines) :]:
+                escaped = escape_fn(new_line.rstrip("\n"))
+                append(
+                    f"<div class='diff-line diff-added'><span class='diff-marker'>+</span>{escaped}</div>"
+                )
+        elif tag == "delete":
+            for line in old_lines[i1:i2]:
+                escaped = escape_fn(line.rstrip("\n"))
+                append(
+                    f"<div class='diff-line diff-removed'><span class='diff-marker'>-</span>{escaped}</div>"
+                )
+        elif tag == "insert":
+            for line in new_lines[j1:j2]:
+                escaped = escape_fn(line.rstrip("\n"))
+                append(
+                    f"<div class='diff-line diff-added'><span class='diff-marker'>+</span>{escaped}</div>"
+                )
 
     html_parts.append("</div>")
     return "".join(html_parts)
+
+
+# Build the lexer caches at import so the first rendered code block doesn't
+# pay the get_all_lexers() walk, and so the fused pattern regex exists before
+# any highlight call.
+_init_lexer_caches()
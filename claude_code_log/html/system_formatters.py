@@ -8,7 +8,11 @@ Part of the thematic formatter organization:
 - tool_formatters.py: tool use/result content
 """
 
-import html
+from functools import lru_cache
+
+# markupsafe (already a jinja2 dependency) escapes in a single C pass,
+# unlike stdlib html.escape which chains str.replace calls
+from markupsafe import escape as _escape
 
 from .ansi_colors import convert_ansi_to_html
 from ..models import (
@@ -17,6 +21,44 @@ from ..models import (
     SystemMessage,
 )
 
+_LEVEL_ICONS = {"warning": "⚠️", "error": "❌", "info": "ℹ️"}
+_DEFAULT_ICON = "ℹ️"
+
+# The same failing hook tends to fire repeatedly within a session, so identical
+# text/error strings recur verbatim; memoize the ANSI conversion for them
+_ansi_to_html = lru_cache(maxsize=1024)(convert_ansi_to_html)
+
+
+def _maybe_ansi(text: str) -> str:
+    """Convert ANSI codes to HTML, bypassing the cache for plain text.
+
+    Most system/hook text contains no escape sequences; those strings are
+    cheap to escape directly and would otherwise crowd ANSI-bearing entries
+    out of the memoization cache.
+    """
+    if "\x1b" in text or "\x9b" in text:
+        return _ansi_to_html(text)
+    return convert_ansi_to_html(text)
+
+
+# Constant <details> shells for the two hook summary variants; only the
+# command/error sections vary per message
+_HOOK_SHELL_FAIL = """<details class="hook-summary">
+<summary><strong>🪝</strong> Hook failed</summary>
+<div class="hook-details">
+%s
+%s
+</div>
+</details>"""
+_HOOK_SHELL_OK = _HOOK_SHELL_FAIL.replace("Hook failed", "Hook output")
+
+# Per-entry wrapper fragments, hoisted so loop iterations append shared
+# constant objects instead of building a fresh f-string around each entry
+_CODE_OPEN = "<code>"
+_CODE_CLOSE = "</code>"
+_PRE_OPEN = '<pre class="hook-error">'
+_PRE_CLOSE = "</pre>"
+
 
 def format_system_content(content: SystemMessage) -> str:
     """Format a system message with level-specific icon.
@@ -27,11 +69,63 @@ def format_system_content(content: SystemMessage) -> str:
     Returns:
         HTML with icon and ANSI-converted text
     """
-    level_icon = {"warning": "⚠️", "error": "❌", "info": "ℹ️"}.get(content.level, "ℹ️")
-    html_content = convert_ansi_to_html(content.text)
+    level_icon = _LEVEL_ICONS.get(content.level, _DEFAULT_ICON)
+    html_content = _maybe_ansi(content.text)
     return f"<strong>{level_icon}</strong> {html_content}"
 
 
+def format_system_content_batch(items: list[SystemMessage]) -> list[str]:
+    """Format many system messages in one call.
+
+    Binds the icon table and ANSI converter to locals so the comprehension
+    skips the per-call global lookups of N format_system_content calls.
+
+    Args:
+        items: SystemMessages to format, in order
+
+    Returns:
+        One HTML string per input message
+    """
+    icon = _LEVEL_ICONS.get
+    default = _DEFAULT_ICON
+    ansi = _maybe_ansi
+    return [
+        f"<strong>{icon(it.level, default)}</strong> {ansi(it.text)}" for it in items
+    ]
+
+
+@lru_cache(maxsize=1024)
+def _render_hook_summary(commands: tuple[str, ...], errors: tuple[str, ...]) -> str:
+    """Render the hook summary HTML for a (commands, errors) pair.
+
+    Cached on the content itself: the same hook failing with the same output
+    recurs many times per session, so repeats cost a dict lookup instead of a
+    full rebuild.
+    """
+    # Build the command section (list + join keeps assembly linear; string
+    # += in a loop can degrade to quadratic copying)
+    command_html = ""
+    if commands:
+        parts = ['<div class="hook-commands">']
+        append = parts.append
+        for cmd in commands:
+            # Truncate very long commands
+            append(_CODE_OPEN)
+            append(str(_escape(cmd if len(cmd) <= 100 else cmd[:97] + "...")))
+            append(_CODE_CLOSE)
+        append("</div>")
+        command_html = "".join(parts)
+
+    # Build the error output section: all errors fused into one <pre>
+    # (ANSI-converted, newline-separated) so N wrapper pairs collapse to one
+    error_html = ""
+    if errors:
+        error_html = _PRE_OPEN + "\n".join(map(_maybe_ansi, errors)) + _PRE_CLOSE
+
+    shell = _HOOK_SHELL_FAIL if errors else _HOOK_SHELL_OK
+    return shell % (command_html, error_html)
+
+
 def format_hook_summary_content(content: HookSummaryMessage) -> str:
     """Format a hook summary as collapsible details.
 
@@ -43,39 +137,31 @@ def format_hook_summary_content(content: HookSummaryMessage) -> str:
     Returns:
         HTML with collapsible details section
     """
-    # Determine if this is a failure or just output
-    has_errors = bool(content.hook_errors)
-    summary_icon = "🪝"
-    summary_text = "Hook failed" if has_errors else "Hook output"
+    return _render_hook_summary(
+        tuple(info.command for info in content.hook_infos),
+        tuple(content.hook_errors),
+    )
 
-    # Build the command section
-    command_html = ""
-    if content.hook_infos:
-        command_html = '<div class="hook-commands">'
-        for info in content.hook_infos:
-            # Truncate very long commands
-            cmd = info.command
-            display_cmd = cmd if len(cmd) <= 100 else cmd[:97] + "..."
-            command_html += f"<code>{html.escape(display_cmd)}</code>"
-        command_html += "</div>"
 
-    # Build the error output section
-    error_html = ""
-    if content.hook_errors:
-        error_html = '<div class="hook-errors">'
-        for err in content.hook_errors:
-            # Convert ANSI codes in error output
-            formatted_err = convert_ansi_to_html(err)
-            error_html += f'<pre class="hook-error">{formatted_err}</pre>'
-        error_html += "</div>"
-
-    return f"""<details class="hook-summary">
-<summary><strong>{summary_icon}</strong> {summary_text}</summary>
-<div class="hook-details">
-{command_html}
-{error_html}
-</div>
-</details>"""
+def format_hook_summary_content_into(
+    content: HookSummaryMessage, out: list[str]
+) -> None:
+    """Append the rendered hook summary to a shared output buffer.
+
+    Buffer-building callers can collect fragments into one list and join
+    once at the end instead of concatenating per-message return values.
+    Repeated summaries append the cached string without re-rendering.
+
+    Args:
+        content: HookSummaryMessage with execution details
+        out: Fragment list the rendered HTML is appended to
+    """
+    out.append(
+        _render_hook_summary(
+            tuple(info.command for info in content.hook_infos),
+            tuple(content.hook_errors),
+        )
+    )
 
 
 def format_session_header_content(content: SessionHeaderMessage) -> str:
@@ -87,12 +173,18 @@ def format_session_header_content(content: SessionHeaderMessage) -> str:
     Returns:
         HTML for the session header display
     """
-    escaped_title = html.escape(content.title)
-    return escaped_title
+    # Most titles contain none of the HTML-significant characters; a few
+    # C-level substring scans are cheaper than an unconditional escape copy
+    title = content.title
+    if "&" in title or "<" in title or ">" in title or '"' in title or "'" in title:
+        return str(_escape(title))
+    return title
 
 
 __all__ = [
     "format_system_content",
+    "format_system_content_batch",
     "format_hook_summary_content",
+    "format_hook_summary_content_into",
     "format_session_header_content",
 ]
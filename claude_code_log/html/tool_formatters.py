@@ -16,8 +16,8 @@ HTML for display in transcripts.
 
 import base64
 import binascii
+import functools
 import json
-import re
 from typing import Any, cast
 
 from .utils import (
@@ -53,9 +53,44 @@ from ..models import (
 from .ansi_colors import convert_ansi_to_html
 from .renderer_code import render_single_diff
 
+# Collapsible <details> shells shared by the long-content and image tool
+# result paths; hoisted so each call fills placeholders instead of
+# re-evaluating a multi-line f-string
+_LONG_DETAILS_TMPL = """
+    <details class="collapsible-details">
+        <summary>
+            <div class="preview-content"><pre>{preview}</pre></div>
+        </summary>
+        <div class="details-content">
+            <pre>{full}</pre>
+        </div>
+    </details>
+    """
+_IMAGES_DETAILS_TMPL = """
+    <details class="collapsible-details">
+        <summary>
+            <span class='preview-text'>{preview_text}</span>
+        </summary>
+        <div class="details-content">
+            {combined}
+        </div>
+    </details>
+    """
+
+# Image media types allowed in embedded tool results (no SVG, to prevent XSS)
+_ALLOWED_MEDIA = frozenset({"image/png", "image/jpeg", "image/gif", "image/webp"})
+
 
 # -- AskUserQuestion Tool -----------------------------------------------------
 
+# Answered Q&A block shared by the result and output formatters
+_QA_BLOCK_TMPL = (
+    '<div class="question-block answered">'
+    '<div class="question-text"><span class="qa-label">Q:</span> {q}</div>'
+    '<div class="answer-text"><span class="qa-label answer">A:</span> {a}</div>'
+    "</div>"
+)
+
 
 def _render_question_item(q: AskUserQuestionItem) -> str:
     """Render a single question item to HTML."""
@@ -75,8 +110,10 @@ def _render_question_item(q: AskUserQuestionItem) -> str:
     # Options (if present)
     if q.options:
         select_hint = "(select multiple)" if q.multiSelect else "(select one)"
-        html_parts.append(f'<div class="question-options-hint">{select_hint}</div>')
-        html_parts.append('<ul class="question-options">')
+        html_parts.append(
+            f'<div class="question-options-hint">{select_hint}</div>'
+            '<ul class="question-options">'
+        )
         for opt in q.options:
             label = escape_html(opt.label)
             if opt.description:
@@ -112,11 +149,8 @@ def format_askuserquestion_input(ask_input: AskUserQuestionInput) -> str:
         return '<div class="askuserquestion-content"><em>No question</em></div>'
 
     # Build HTML for all questions
-    html_parts: list[str] = ['<div class="askuserquestion-content">']
-    for q in questions:
-        html_parts.append(_render_question_item(q))
-    html_parts.append("</div>")  # Close askuserquestion-content
-    return "".join(html_parts)
+    body = "".join(map(_render_question_item, questions))
+    return f'<div class="askuserquestion-content">{body}</div>'
 
 
 def format_askuserquestion_result(content: str) -> str:
@@ -134,43 +168,53 @@ def format_askuserquestion_result(content: str) -> str:
 
     # Extract the Q&A portion between the colon and the final sentence
     # Pattern: 'User has answered your questions: "Q"="A", "Q"="A". You can now...'
-    match = re.match(
-        r"User has answered your questions?: (.+)\. You can now continue",
-        content,
-        re.DOTALL,
-    )
-    if not match:
+    # The result grammar is fixed, so a few literal scans replace the regex
+    # engine: skip the prefix (with optional plural s), then take everything
+    # up to the last continuation sentence, mirroring the greedy match
+    pos = len("User has answered your question")
+    if content.startswith("s", pos):
+        pos += 1
+    if not content.startswith(": ", pos):
         return ""
-
-    qa_portion = match.group(1)
-
-    # Parse "Question"="Answer" pairs
-    # Pattern: "question text"="answer text"
-    qa_pattern = re.compile(r'"([^"]+)"="([^"]+)"')
-    pairs = qa_pattern.findall(qa_portion)
+    pos += 2
+    end = content.rfind(". You can now continue")
+    if end <= pos:
+        return ""
+    qa_portion = content[pos:end]
+
+    # Parse "Question"="Answer" pairs with a two-pointer scan; on a malformed
+    # candidate, resume one char past the opening quote as the regex would
+    pairs: list[tuple[str, str]] = []
+    i = 0
+    find = qa_portion.find
+    while True:
+        q_open = find('"', i)
+        if q_open == -1:
+            break
+        q_close = find('"', q_open + 1)
+        if q_close == -1:
+            break
+        if q_close == q_open + 1 or not qa_portion.startswith('="', q_close + 1):
+            i = q_open + 1
+            continue
+        a_open = q_close + 2
+        a_close = find('"', a_open + 1)
+        if a_close == -1 or a_close == a_open + 1:
+            i = q_open + 1
+            continue
+        pairs.append(
+            (qa_portion[q_open + 1 : q_close], qa_portion[a_open + 1 : a_close])
+        )
+        i = a_close + 1
 
     if not pairs:
         return ""
 
-    # Build styled HTML
-    html_parts: list[str] = [
-        '<div class="askuserquestion-content askuserquestion-result">'
-    ]
-
-    for question, answer in pairs:
-        escaped_q = escape_html(question)
-        escaped_a = escape_html(answer)
-        html_parts.append('<div class="question-block answered">')
-        html_parts.append(
-            f'<div class="question-text"><span class="qa-label">Q:</span> {escaped_q}</div>'
-        )
-        html_parts.append(
-            f'<div class="answer-text"><span class="qa-label answer">A:</span> {escaped_a}</div>'
-        )
-        html_parts.append("</div>")
-
-    html_parts.append("</div>")
-    return "".join(html_parts)
+    # Build styled HTML: one string per pair, joined in a single pass
+    body = "".join(
+        _QA_BLOCK_TMPL.format(q=escape_html(q), a=escape_html(a)) for q, a in pairs
+    )
+    return f'<div class="askuserquestion-content askuserquestion-result">{body}</div>'
 
 
 # -- ExitPlanMode Tool --------------------------------------------------------
@@ -201,14 +245,11 @@ def format_exitplanmode_result(content: str) -> str:
     We truncate everything after "## Approved Plan:" to avoid duplication.
     For error results (plan not approved), we keep the full content.
     """
-    # Check if this is a successful approval
-    if "User has approved your plan" in content:
-        # Truncate at "## Approved Plan:"
-        marker = "## Approved Plan:"
-        marker_pos = content.find(marker)
-        if marker_pos > 0:
-            # Keep everything before the marker, strip trailing whitespace
-            return content[:marker_pos].rstrip()
+    # Split once; the confirmation message always precedes the marker, so the
+    # approval check only needs to scan the (much smaller) head portion
+    head, sep, _ = content.partition("## Approved Plan:")
+    if sep and head and "User has approved your plan" in head:
+        return head.rstrip()
 
     # For errors or other cases, return as-is
     return content
@@ -234,25 +275,16 @@ def format_websearch_input(search_input: WebSearchInput) -> str:
 
 def _websearch_as_markdown(output: WebSearchOutput) -> str:
     """Convert WebSearch output to markdown: summary, then links at bottom."""
-    parts: list[str] = []
+    links_md = "\n".join(f"- [{link.title}]({link.url})" for link in output.links)
 
-    # Summary first (the analysis text)
+    # Summary first (the analysis text), links at the bottom after a separator
+    if output.summary and links_md:
+        return f"{output.summary}\n\n---\n\n{links_md}"
     if output.summary:
-        parts.append(output.summary)
-
-    # Links at the bottom after a separator
-    if output.links:
-        if parts:
-            parts.append("")  # Blank line before separator
-            parts.append("---")
-            parts.append("")  # Blank line after separator
-        for link in output.links:
-            parts.append(f"- [{link.title}]({link.url})")
-    elif not output.summary:
-        # Only show "no results" if there's also no summary
-        parts.append("*No results found*")
-
-    return "\n".join(parts)
+        return output.summary
+    if links_md:
+        return links_md
+    return "*No results found*"
 
 
 def format_websearch_output(output: WebSearchOutput) -> str:
@@ -270,6 +302,15 @@ def format_websearch_output(output: WebSearchOutput) -> str:
 
 # -- TodoWrite Tool -----------------------------------------------------------
 
+_TODO_STATUS_EMOJIS = {"pending": "⏳", "in_progress": "🔄", "completed": "✅"}
+_TODO_EMPTY_HTML = '<div class="todo-content"><p><em>No todos found</em></p></div>'
+_TODO_ITEM_TMPL = (
+    '<div class="todo-item {status} {priority}">'
+    '<span class="todo-status">{emoji}</span>'
+    '<span class="todo-content">{content}</span>'
+    "{id_html}</div>"
+)
+
 
 def format_todowrite_input(todo_input: TodoWriteInput) -> str:
     """Format TodoWrite tool use content as a todo list.
@@ -278,14 +319,7 @@ def format_todowrite_input(todo_input: TodoWriteInput) -> str:
         todo_input: Typed TodoWriteInput with list of todo items.
     """
     if not todo_input.todos:
-        return """
-        <div class="todo-content">
-            <p><em>No todos found</em></p>
-        </div>
-        """
-
-    # Status emojis
-    status_emojis = {"pending": "⏳", "in_progress": "🔄", "completed": "✅"}
+        return _TODO_EMPTY_HTML
 
     # Build todo list HTML - todos are typed TodoWriteItem objects
     todo_items: list[str] = []
@@ -293,28 +327,18 @@ def format_todowrite_input(todo_input: TodoWriteInput) -> str:
         todo_id = escape_html(todo.id) if todo.id else ""
         content = escape_html(todo.content) if todo.content else ""
         status = todo.status or "pending"
-        priority = todo.priority or "medium"
-        status_emoji = status_emojis.get(status, "⏳")
-
-        # CSS class for styling
-        item_class = f"todo-item {status} {priority}"
-
         id_html = f'<span class="todo-id">#{todo_id}</span>' if todo.id else ""
-        todo_items.append(f"""
-            <div class="{item_class}">
-                <span class="todo-status">{status_emoji}</span>
-                <span class="todo-content">{content}</span>
-                {id_html}
-            </div>
-        """)
-
-    todos_html = "".join(todo_items)
+        todo_items.append(
+            _TODO_ITEM_TMPL.format(
+                status=status,
+                priority=todo.priority or "medium",
+                emoji=_TODO_STATUS_EMOJIS.get(status, "⏳"),
+                content=content,
+                id_html=id_html,
+            )
+        )
 
-    return f"""
-    <div class="todo-list">
-        {todos_html}
-    </div>
-    """
+    return f'<div class="todo-list">{"".join(todo_items)}</div>'
 
 
 # -- File Tools (Read/Write) --------------------------------------------------
@@ -403,27 +427,26 @@ def format_bash_output(output: BashOutput) -> str:
         HTML string with ANSI colors converted or plain text
     """
     content = output.content
-    if output.has_ansi:
-        full_html = convert_ansi_to_html(content)
-    else:
-        full_html = escape_html(content)
 
     # For short content, show directly
     if len(content) <= 200:
-        return f"<pre>{full_html}</pre>"
-
-    # For longer content, use collapsible details
-    preview_html = escape_html(content[:200]) + "..."
-    return f"""
-    <details class="collapsible-details">
-        <summary>
-            <div class="preview-content"><pre>{preview_html}</pre></div>
-        </summary>
-        <div class="details-content">
-            <pre>{full_html}</pre>
-        </div>
-    </details>
-    """
+        if output.has_ansi:
+            return f"<pre>{convert_ansi_to_html(content)}</pre>"
+        return f"<pre>{escape_html(content)}</pre>"
+
+    # For longer content, use collapsible details. The full body reuses the
+    # escaped preview prefix rather than escaping the first 200 chars twice;
+    # the \r guard keeps a CRLF pair split at the boundary collapsing to one
+    # newline as a whole-string escape would.
+    head = content[:200]
+    preview_html = escape_html(head) + "..."
+    if output.has_ansi:
+        full_html = convert_ansi_to_html(content)
+    elif head.endswith("\r"):
+        full_html = escape_html(content)
+    else:
+        full_html = preview_html[:-3] + escape_html(content[200:])
+    return _LONG_DETAILS_TMPL.format(preview=preview_html, full=full_html)
 
 
 def format_task_output(output: TaskOutput) -> str:
@@ -447,24 +470,11 @@ def format_askuserquestion_output(output: AskUserQuestionOutput) -> str:
     Returns:
         HTML string with styled question/answer blocks
     """
-    html_parts: list[str] = [
-        '<div class="askuserquestion-content askuserquestion-result">'
-    ]
-
-    for qa in output.answers:
-        escaped_q = escape_html(qa.question)
-        escaped_a = escape_html(qa.answer)
-        html_parts.append('<div class="question-block answered">')
-        html_parts.append(
-            f'<div class="question-text"><span class="qa-label">Q:</span> {escaped_q}</div>'
-        )
-        html_parts.append(
-            f'<div class="answer-text"><span class="qa-label answer">A:</span> {escaped_a}</div>'
-        )
-        html_parts.append("</div>")
-
-    html_parts.append("</div>")
-    return "".join(html_parts)
+    body = "".join(
+        _QA_BLOCK_TMPL.format(q=escape_html(qa.question), a=escape_html(qa.answer))
+        for qa in output.answers
+    )
+    return f'<div class="askuserquestion-content askuserquestion-result">{body}</div>'
 
 
 def format_exitplanmode_output(output: ExitPlanModeOutput) -> str:
@@ -534,11 +544,11 @@ def format_multiedit_input(multiedit_input: MultiEditInput) -> str:
 
     # Render each edit as a diff - edits are typed EditItem objects
     for idx, edit in enumerate(multiedit_input.edits, 1):
+        diff_html = render_single_diff(edit.old_string, edit.new_string)
         html_parts.append(
             f"<div class='multiedit-item'><div class='multiedit-item-header'>Edit #{idx}</div>"
+            f"{diff_html}</div>"
         )
-        html_parts.append(render_single_diff(edit.old_string, edit.new_string))
-        html_parts.append("</div>")
 
     html_parts.append("</div>")
     return "".join(html_parts)
@@ -685,12 +695,14 @@ def render_params_table(params: dict[str, Any]) -> str:
                 escaped_value = escape_html(str(cast(object, value)))
                 value_html = escaped_value
         else:
-            # Simple value, render as-is (or collapsible if long)
-            escaped_value = escape_html(str(value))
+            # Simple value, render as-is (or collapsible if long); stringify
+            # once — custom __str__ implementations can be costly
+            value_str = str(value)
+            escaped_value = escape_html(value_str)
 
             # Make long string values collapsible
-            if len(str(value)) > 100:
-                preview = escape_html(str(value)[:80]) + "..."
+            if len(value_str) > 100:
+                preview = escape_html(value_str[:80]) + "..."
                 value_html = f"""
                     <details class='tool-param-collapsible'>
                         <summary>{preview}</summary>
@@ -714,6 +726,21 @@ def render_params_table(params: dict[str, Any]) -> str:
 # -- Tool Result Content Fallback Formatter -----------------------------------
 
 
+@functools.lru_cache(maxsize=64)
+def _is_valid_base64(data: str) -> bool:
+    """Check whether a string is valid base64.
+
+    Cached because transcripts often embed the same small image (logos,
+    status icons) across many tool results; repeats skip the O(n) decode.
+    The cache keys on the full payload, so distinct data never aliases.
+    """
+    try:
+        base64.b64decode(data, validate=True)
+        return True
+    except (binascii.Error, ValueError):
+        return False
+
+
 def format_tool_result_content_raw(tool_result: ToolResultContent) -> str:
     """Format raw ToolResultContent as HTML (fallback formatter).
 
@@ -740,30 +767,20 @@ def format_tool_result_content_raw(tool_result: ToolResultContent) -> str:
                     content_parts.append(text_value)
             elif item_type == "image":
                 # Handle image content within tool results
-                source = cast(dict[str, Any], item.get("source", {}))
-                if source:
-                    media_type: str = str(source.get("media_type", "image/png"))
-                    # Restrict to safe image types to prevent XSS via SVG
-                    allowed_media_types = {
-                        "image/png",
-                        "image/jpeg",
-                        "image/gif",
-                        "image/webp",
-                    }
-                    if media_type not in allowed_media_types:
+                source = cast(dict[str, Any], item.get("source") or {})
+                media_type: str = str(source.get("media_type", "image/png"))
+                if media_type not in _ALLOWED_MEDIA:
+                    continue
+                data: str = str(source.get("data", ""))
+                if data:
+                    # Validate base64 data to prevent corruption/injection
+                    if not _is_valid_base64(data):
                         continue
-                    data: str = str(source.get("data", ""))
-                    if data:
-                        # Validate base64 data to prevent corruption/injection
-                        try:
-                            base64.b64decode(data, validate=True)
-                        except (binascii.Error, ValueError):
-                            continue
-                        data_url = f"data:{media_type};base64,{data}"
-                        image_html_parts.append(
-                            f'<img src="{escape_html(data_url)}" alt="Tool result image" '
-                            f'class="tool-result-image" />'
-                        )
+                    data_url = f"data:{media_type};base64,{data}"
+                    image_html_parts.append(
+                        f'<img src="{escape_html(data_url)}" alt="Tool result image" '
+                        f'class="tool-result-image" />'
+                    )
         raw_content = "\n".join(content_parts)
         has_images = len(image_html_parts) > 0
 
@@ -772,52 +789,38 @@ def format_tool_result_content_raw(tool_result: ToolResultContent) -> str:
     if raw_content:
         raw_content = strip_error_tags(raw_content)
         # Remove "String: ..." portions that echo the input
-        raw_content = re.sub(r"\nString:.*$", "", raw_content, flags=re.DOTALL)
-
-    # Format the content
-    full_html = escape_html(raw_content)
-    preview_html = (
-        escape_html(raw_content[:200]) + "..."
-        if len(raw_content) > 200
-        else escape_html(raw_content)
-    )
+        # (a literal find beats the old \nString:.*$ regex truncation)
+        echo_pos = raw_content.find("\nString:")
+        if echo_pos != -1:
+            raw_content = raw_content[:echo_pos]
 
     # Build final HTML based on content length and presence of images
     if has_images:
         # Combine text and images
+        full_html = escape_html(raw_content)
         text_html = f"<pre>{full_html}</pre>" if full_html else ""
         images_html = "".join(image_html_parts)
         combined_content = f"{text_html}{images_html}"
 
         # Always make collapsible when images are present
-        preview_text = "Text and image content"
-        return f"""
-    <details class="collapsible-details">
-        <summary>
-            <span class='preview-text'>{preview_text}</span>
-        </summary>
-        <div class="details-content">
-            {combined_content}
-        </div>
-    </details>
-    """
+        return _IMAGES_DETAILS_TMPL.format(
+            preview_text="Text and image content", combined=combined_content
+        )
     else:
         # Text-only content
         # For simple content, show directly without collapsible wrapper
         if len(raw_content) <= 200:
-            return f"<pre>{full_html}</pre>"
-
-        # For longer content, use collapsible details
-        return f"""
-    <details class="collapsible-details">
-        <summary>
-            <div class="preview-content"><pre>{preview_html}</pre></div>
-        </summary>
-        <div class="details-content">
-            <pre>{full_html}</pre>
-        </div>
-    </details>
-    """
+            return f"<pre>{escape_html(raw_content)}</pre>"
+
+        # For longer content, use collapsible details; reuse the escaped
+        # preview prefix for the full body (same boundary guard as above)
+        head = raw_content[:200]
+        preview_html = escape_html(head) + "..."
+        if head.endswith("\r"):
+            full_html = escape_html(raw_content)
+        else:
+            full_html = preview_html[:-3] + escape_html(raw_content[200:])
+        return _LONG_DETAILS_TMPL.format(preview=preview_html, full=full_html)
 
 
 # -- Public Exports -----------------------------------------------------------
@@ -8,6 +8,7 @@ Part of the thematic formatter organization:
 - tool_formatters.py: tool use/result content
 """
 
+import functools
 import re
 from typing import Callable, Optional
 
@@ -29,13 +30,37 @@ from ..models import (
     UserTextMessage,
 )
 from .tool_formatters import render_params_table
-from .utils import escape_html, render_collapsible_code, render_markdown_collapsible
+from .utils import (
+    _count_lines,
+    escape_html,
+    render_collapsible_code,
+    render_markdown_collapsible,
+)
 
 
 # =============================================================================
 # Formatting Functions
 # =============================================================================
 
+# Bash and command outputs repeat across retries (same failing test run,
+# same directory listing), so memoize the ANSI conversion for them; large
+# one-off outputs bypass the cache to bound its memory
+_cached_ansi = functools.lru_cache(maxsize=512)(convert_ansi_to_html)
+
+
+def _ansi_to_html(text: str) -> str:
+    """Convert ANSI codes to HTML, caching results for small outputs."""
+    if len(text) < 32 * 1024:
+        return _cached_ansi(text)
+    return convert_ansi_to_html(text)
+
+
+# Shared results for the empty-content fast paths
+_EMPTY_PRE = "<pre></pre>"
+_BASH_NO_OUTPUT = (
+    "<pre class='bash-stdout'><span class='bash-empty'>(no output)</span></pre>"
+)
+
 
 def format_slash_command_content(content: SlashCommandMessage) -> str:
     """Format slash command content as HTML.
@@ -49,8 +74,12 @@ def format_slash_command_content(content: SlashCommandMessage) -> str:
     escaped_command_name = escape_html(content.command_name)
     escaped_command_args = escape_html(content.command_args)
 
-    # Format the command contents with proper line breaks
-    formatted_contents = content.command_contents.replace("\\n", "\n")
+    # Format the command contents with proper line breaks; JSONL decoding has
+    # usually unescaped these already, so skip the copy when none are present
+    contents = content.command_contents
+    formatted_contents = (
+        contents.replace("\\n", "\n") if "\\n" in contents else contents
+    )
     escaped_command_contents = escape_html(formatted_contents)
 
     # Build the content HTML - command name is the primary content
@@ -58,8 +87,7 @@ def format_slash_command_content(content: SlashCommandMessage) -> str:
     if content.command_args:
         content_parts.append(f"<strong>Args:</strong> {escaped_command_args}")
     if content.command_contents:
-        lines = escaped_command_contents.splitlines()
-        line_count = len(lines)
+        line_count = _count_lines(escaped_command_contents)
         if line_count <= 12:
             # Short content, show inline
             details_html = (
@@ -67,7 +95,8 @@ def format_slash_command_content(content: SlashCommandMessage) -> str:
             )
         else:
             # Long content, make collapsible with truncation indicator
-            preview = "\n".join(lines[:5]) + "\n..."
+            # Bounded split: stop scanning after the 5 preview lines
+            preview = "\n".join(escaped_command_contents.split("\n", 5)[:5]) + "\n..."
             collapsible = render_collapsible_code(
                 f"<pre>{preview}</pre>",
                 f"<pre>{escaped_command_contents}</pre>",
@@ -95,7 +124,7 @@ def format_command_output_content(content: CommandOutputMessage) -> str:
         )
     else:
         # Convert ANSI codes to HTML for colored display
-        html_content = convert_ansi_to_html(content.stdout)
+        html_content = _ansi_to_html(content.stdout)
         # Use <pre> to preserve formatting and line breaks
         return f"<pre class='command-output-content'>{html_content}</pre>"
 
@@ -131,40 +160,39 @@ def format_bash_output_content(
     Returns:
         HTML string for the bash output display
     """
-    output_parts: list[tuple[str, str, int, str]] = []
-    total_lines = 0
-
-    if content.stdout:
-        escaped_stdout = convert_ansi_to_html(content.stdout)
-        stdout_lines = len(content.stdout.splitlines())
-        total_lines += stdout_lines
-        output_parts.append(("stdout", escaped_stdout, stdout_lines, content.stdout))
-
-    if content.stderr:
-        escaped_stderr = convert_ansi_to_html(content.stderr)
-        stderr_lines = len(content.stderr.splitlines())
-        total_lines += stderr_lines
-        output_parts.append(("stderr", escaped_stderr, stderr_lines, content.stderr))
-
-    if not output_parts:
+    # Specialized per shape: stdout-only is by far the dominant case, so it
+    # (and the other two) build their HTML directly without part lists.
+    # raw_first is the first output, which the collapsible preview comes from.
+    stdout = content.stdout
+    stderr = content.stderr
+
+    if not stdout and not stderr:
         # Empty output
-        return (
-            "<pre class='bash-stdout'><span class='bash-empty'>(no output)</span></pre>"
+        return _BASH_NO_OUTPUT
+
+    if stdout and not stderr:
+        total_lines = _count_lines(stdout)
+        full_html = f"<pre class='bash-stdout'>{_ansi_to_html(stdout)}</pre>"
+        raw_first = stdout
+    elif stderr and not stdout:
+        total_lines = _count_lines(stderr)
+        full_html = f"<pre class='bash-stderr'>{_ansi_to_html(stderr)}</pre>"
+        raw_first = stderr
+    else:
+        total_lines = _count_lines(stdout) + _count_lines(stderr)
+        full_html = (
+            f"<pre class='bash-stdout'>{_ansi_to_html(stdout)}</pre>"
+            f"<pre class='bash-stderr'>{_ansi_to_html(stderr)}</pre>"
         )
-
-    # Build the HTML parts
-    html_parts: list[str] = []
-    for output_type, escaped_content, _, _ in output_parts:
-        css_name = f"bash-{output_type}"
-        html_parts.append(f"<pre class='{css_name}'>{escaped_content}</pre>")
-
-    full_html = "".join(html_parts)
+        raw_first = stdout
 
     # Wrap in collapsible if output is large
     if total_lines > collapse_threshold:
         # Create preview (first few lines)
-        first_output = output_parts[0]
-        raw_preview = "\n".join(first_output[3].split("\n")[:preview_lines])
+        # maxsplit stops the scan after the preview lines instead of
+        # splitting the entire (possibly huge) output
+        preview_parts = raw_first.split("\n", preview_lines)
+        raw_preview = "\n".join(preview_parts[:preview_lines])
         preview_html = escape_html(raw_preview)
         if total_lines > preview_lines:
             preview_html += "\n..."
@@ -191,6 +219,8 @@ def format_user_text_content(text: str) -> str:
     Returns:
         HTML string with escaped text in a pre tag
     """
+    if not text:
+        return _EMPTY_PRE
     escaped_text = escape_html(text)
     return f"<pre>{escaped_text}</pre>"
 
@@ -269,10 +299,17 @@ def format_user_memory_content(content: UserMemoryMessage) -> str:
     Returns:
         HTML string with escaped text in a pre tag
     """
+    if not content.memory_text:
+        return _EMPTY_PRE
     escaped_text = escape_html(content.memory_text)
     return f"<pre>{escaped_text}</pre>"
 
 
+_TOTAL_TOKENS_PATTERN = re.compile(r"<total_tokens>(\d+)</total_tokens>")
+_TOOL_USES_PATTERN = re.compile(r"<tool_uses>(\d+)</tool_uses>")
+_DURATION_MS_PATTERN = re.compile(r"<duration_ms>(\d+)</duration_ms>")
+
+
 def format_task_notification_content(content: TaskNotificationMessage) -> str:
     """Format task notification from a background agent as HTML.
 
@@ -290,13 +327,9 @@ def format_task_notification_content(content: TaskNotificationMessage) -> str:
     # Usage metadata line
     meta_parts: list[str] = []
     if content.usage_info:
-        tokens_match = re.search(
-            r"<total_tokens>(\d+)</total_tokens>", content.usage_info
-        )
-        tools_match = re.search(r"<tool_uses>(\d+)</tool_uses>", content.usage_info)
-        duration_match = re.search(
-            r"<duration_ms>(\d+)</duration_ms>", content.usage_info
-        )
+        tokens_match = _TOTAL_TOKENS_PATTERN.search(content.usage_info)
+        tools_match = _TOOL_USES_PATTERN.search(content.usage_info)
+        duration_match = _DURATION_MS_PATTERN.search(content.usage_info)
         if tokens_match:
             tokens = int(tokens_match.group(1))
             meta_parts.append(f"{tokens:,} tokens")
@@ -354,16 +387,20 @@ def _format_selection(selection: IdeSelection) -> str:
     """Format a single IDE selection notification as HTML."""
     escaped_content = escape_html(selection.content)
 
-    # For large selections, make them collapsible
+    # For large selections, make them collapsible; join on a tuple sizes the
+    # result once instead of chaining intermediate concatenations
     if len(selection.content) > 200:
-        preview = escape_html(selection.content[:150]) + "..."
-        return (
-            f"<div class='ide-notification ide-selection'>"
-            f"<details class='ide-selection-collapsible'>"
-            f"<summary>📝 {preview}</summary>"
-            f"<pre class='ide-selection-content'>{escaped_content}</pre>"
-            f"</details>"
-            f"</div>"
+        preview = escape_html(selection.content[:150])
+        return "".join(
+            (
+                "<div class='ide-notification ide-selection'>"
+                "<details class='ide-selection-collapsible'>"
+                "<summary>📝 ",
+                preview,
+                "...</summary><pre class='ide-selection-content'>",
+                escaped_content,
+                "</pre></details></div>",
+            )
         )
     else:
         return f"<div class='ide-notification ide-selection'>📝 {escaped_content}</div>"
@@ -377,22 +414,28 @@ def _format_diagnostic(diagnostic: IdeDiagnostic) -> list[str]:
         # Parsed JSON diagnostics - render each as a table
         for diag_item in diagnostic.diagnostics:
             table_html = render_params_table(diag_item)
-            notification_html = (
-                f"<div class='ide-notification ide-diagnostic'>"
-                f"⚠️ IDE Diagnostic<br>{table_html}"
-                f"</div>"
+            notifications.append(
+                "".join(
+                    (
+                        "<div class='ide-notification ide-diagnostic'>⚠️ IDE Diagnostic<br>",
+                        table_html,
+                        "</div>",
+                    )
+                )
             )
-            notifications.append(notification_html)
     elif diagnostic.raw_content:
         # JSON parsing failed, render as plain text
         is_truncated = len(diagnostic.raw_content) > 200
         escaped_content = escape_html(diagnostic.raw_content[:200])
-        truncation_marker = "..." if is_truncated else ""
-        notification_html = (
-            f"<div class='ide-notification'>🤖 IDE Diagnostics (parse error)<br>"
-            f"<pre>{escaped_content}{truncation_marker}</pre></div>"
+        notifications.append(
+            "".join(
+                (
+                    "<div class='ide-notification'>🤖 IDE Diagnostics (parse error)<br><pre>",
+                    escaped_content,
+                    "...</pre></div>" if is_truncated else "</pre></div>",
+                )
+            )
         )
-        notifications.append(notification_html)
 
     return notifications
 
@@ -409,21 +452,13 @@ def format_ide_notification_content(content: IdeNotificationContent) -> list[str
     Returns:
         List of HTML notification strings
     """
-    notifications: list[str] = []
-
-    # Format opened files
-    for opened_file in content.opened_files:
-        notifications.append(_format_opened_file(opened_file))
-
-    # Format selections
-    for selection in content.selections:
-        notifications.append(_format_selection(selection))
-
-    # Format diagnostics (may produce multiple notifications per diagnostic)
-    for diagnostic in content.diagnostics:
-        notifications.extend(_format_diagnostic(diagnostic))
-
-    return notifications
+    # Single list construction: opened files, then selections, then
+    # diagnostics (which may produce multiple notifications each)
+    return [
+        *map(_format_opened_file, content.opened_files),
+        *map(_format_selection, content.selections),
+        *(n for diag in content.diagnostics for n in _format_diagnostic(diag)),
+    ]
 
 
 # =============================================================================
@@ -13,8 +13,10 @@ The functions here transform format-neutral TemplateMessage data into
 HTML-specific output.
 """
 
+import bisect
 import functools
-import html
+import re
+import sys
 from pathlib import Path
 from typing import Any, Optional, TYPE_CHECKING
 
@@ -78,25 +80,53 @@ CSS_CLASS_REGISTRY: dict[type[MessageContent], list[str]] = {
     UnknownMessage: ["unknown"],
 }
 
+# Intern the class vocabulary once so every message shares the same string
+# objects; hyphenated names like "slash-command" are not auto-interned
+CSS_CLASS_REGISTRY = {
+    key: [sys.intern(cls_name) for cls_name in value]
+    for key, value in CSS_CLASS_REGISTRY.items()
+}
+
+
+# Memoized MRO resolution: maps each concrete content type to its registry
+# classes (or [] when unregistered) plus the space-joined baseline string,
+# so the walk and the join each run once per type instead of once per message
+_RESOLVED_CSS_CACHE: dict[type, tuple[list[str], str]] = {}
+
+
+def _resolve_css_classes(content_type: type) -> tuple[list[str], str]:
+    """Resolve registry classes for a concrete content type (cached)."""
+    resolved = _RESOLVED_CSS_CACHE.get(content_type)
+    if resolved is None:
+        classes: list[str] = []
+        for cls in content_type.__mro__:
+            if not issubclass(cls, MessageContent):
+                continue
+            if found := CSS_CLASS_REGISTRY.get(cls):
+                classes = found
+                break
+        resolved = (classes, " ".join(classes))
+        _RESOLVED_CSS_CACHE[content_type] = resolved
+    return resolved
+
 
 def _get_css_classes_from_content(content: MessageContent) -> list[str]:
     """Get CSS classes from content type using the registry.
 
-    Walks the MRO to find a matching registry entry, then adds
-    any dynamic modifiers based on content attributes.
+    Resolves the registry entry for the concrete type (walking the MRO once,
+    cached thereafter), then adds any dynamic modifiers based on content
+    attributes.
     """
-    for cls in type(content).__mro__:
-        if not issubclass(cls, MessageContent):
-            continue
-        if classes := CSS_CLASS_REGISTRY.get(cls):
-            result = list(classes)
-            # Dynamic modifiers based on content attributes
-            if isinstance(content, SystemMessage):
-                result.append(f"system-{content.level}")
-            elif isinstance(content, ToolResultMessage) and content.is_error:
-                result.append("error")
-            return result
-    return []
+    base, _ = _resolve_css_classes(type(content))
+    if not base:
+        return []
+    result = list(base)
+    # Dynamic modifiers based on content attributes
+    if isinstance(content, SystemMessage):
+        result.append(f"system-{content.level}")
+    elif isinstance(content, ToolResultMessage) and content.is_error:
+        result.append("error")
+    return result
 
 
 # -- CSS and Message Display --------------------------------------------------
@@ -119,9 +149,19 @@ def css_class_from_message(msg: "TemplateMessage") -> str:
     Returns:
         Space-separated CSS class string (e.g., "user slash-command sidechain")
     """
+    content = msg.content
+    # Fast path: registered content with no dynamic modifiers and no
+    # sidechain flag returns the pre-joined baseline without list building
+    if content and not msg.is_sidechain and not isinstance(content, SystemMessage):
+        classes, joined = _resolve_css_classes(type(content))
+        if classes and not (
+            isinstance(content, ToolResultMessage) and content.is_error
+        ):
+            return joined
+
     # Get base classes and content-derived modifiers from content type
-    if msg.content:
-        parts = _get_css_classes_from_content(msg.content)
+    if content:
+        parts = _get_css_classes_from_content(content)
         if not parts:
             parts = [msg.type]  # Fallback if content type not in registry
     else:
@@ -146,6 +186,18 @@ def is_session_header(msg: "TemplateMessage") -> bool:
     return isinstance(msg.content, SessionHeaderMessage)
 
 
+# Message types whose emoji depends only on msg.type; the conditional cases
+# (user, assistant, tool_result) stay as explicit branches below
+_EMOJI_TABLE = {
+    "session_header": "📋",
+    "bash-input": "💻",
+    "system": "⚙️",
+    "tool_use": "🛠️",
+    "thinking": "💭",
+    "image": "🖼️",
+}
+
+
 def get_message_emoji(msg: "TemplateMessage") -> str:
     """Return appropriate emoji for message type.
 
@@ -157,45 +209,84 @@ def get_message_emoji(msg: "TemplateMessage") -> str:
     """
     msg_type = msg.type
 
-    if msg_type == "session_header":
-        return "📋"
-    elif msg_type == "user":
+    emoji = _EMOJI_TABLE.get(msg_type)
+    if emoji is not None:
+        return emoji
+    if msg_type == "user":
         # Command output has no emoji (neutral - can be from built-in or user command)
         if isinstance(msg.content, CommandOutputMessage):
             return ""
         return "🤷"
-    elif msg_type == "bash-input":
-        return "💻"
-    elif msg_type == "assistant":
-        if msg.is_sidechain:
-            return "🔗"
-        return "🤖"
-    elif msg_type == "system":
-        return "⚙️"
-    elif msg_type == "tool_use":
-        return "🛠️"
-    elif msg_type == "tool_result":
+    if msg_type == "assistant":
+        return "🔗" if msg.is_sidechain else "🤖"
+    if msg_type == "tool_result":
         if isinstance(msg.content, ToolResultMessage) and msg.content.is_error:
             return "🚨"
         return "🧰"
-    elif msg_type == "thinking":
-        return "💭"
-    elif msg_type == "image":
-        return "🖼️"
     return ""
 
 
 # -- HTML Utilities -----------------------------------------------------------
 
 
+# Entities for the five HTML-significant characters, plus CR -> LF
+# normalization folded into the same pass
+_HTML_ENTITIES = {
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;",
+    "\r": "\n",
+}
+_HTML_SPECIAL_RE = re.compile(r"[&<>\"'\r]")
+
+
 def escape_html(text: str) -> str:
     """Escape HTML special characters in text.
 
     Also normalizes line endings (CRLF -> LF) to prevent double spacing in <pre> blocks.
     """
-    # Normalize CRLF to LF to prevent double line breaks in HTML
-    normalized = text.replace("\r\n", "\n").replace("\r", "\n")
-    return html.escape(normalized)
+    # Find-and-copy escape: the compiled character class locates the next
+    # special character with a C-level scan and the clean span before it is
+    # copied wholesale, so cost tracks the (usually small) number of specials
+    # rather than the length of the string
+    match = _HTML_SPECIAL_RE.search(text)
+    if match is None:
+        # Nothing to escape or normalize: return the original, no copy
+        return text
+    # Short strings that do need escaping (tool params, command lines, file
+    # paths) repeat verbatim across a transcript; memoize those. The length
+    # cap keeps large one-off blobs from filling the cache.
+    if len(text) <= 512:
+        return _escape_html_short(text)
+    return _escape_html_slow(text)
+
+
+@functools.lru_cache(maxsize=4096)
+def _escape_html_short(text: str) -> str:
+    """Cached wrapper around the escape slow path for short strings."""
+    return _escape_html_slow(text)
+
+
+def _escape_html_slow(text: str) -> str:
+    """Escape a string known to contain at least one special character."""
+    # Collapse CRLF pairs first so the lone \r -> \n mapping doesn't double
+    # newlines, then restart the scan on the normalized string
+    text = text.replace("\r\n", "\n")
+    out: list[str] = []
+    append = out.append
+    entities = _HTML_ENTITIES
+    search = _HTML_SPECIAL_RE.search
+    pos = 0
+    while (match := search(text, pos)) is not None:
+        start = match.start()
+        if start > pos:
+            append(text[pos:start])
+        append(entities[text[start]])
+        pos = start + 1
+    append(text[pos:])
+    return "".join(out)
 
 
 def _create_pygments_plugin() -> Any:
@@ -207,6 +298,23 @@ def _create_pygments_plugin() -> Any:
     from pygments.formatters import HtmlFormatter
     from pygments.util import ClassNotFound
 
+    # Formatters and lexers are stateless across highlight() calls, so one
+    # formatter serves every code block and lexers are cached per language
+    shared_formatter: Formatter = HtmlFormatter(
+        linenos=False,  # No line numbers in markdown code blocks
+        cssclass="highlight",
+        wrapcode=True,
+    )
+    plain_lexer = TextLexer()
+
+    @functools.lru_cache(maxsize=64)
+    def lexer_for(lang: str) -> Lexer:
+        """Look up the lexer for a language hint, defaulting to plain text."""
+        try:
+            return get_lexer_by_name(lang, stripall=False)
+        except ClassNotFound:
+            return plain_lexer
+
     def plugin_pygments(md: Any) -> None:
         """Plugin to add Pygments syntax highlighting to code blocks."""
         original_render = md.renderer.block_code
@@ -216,21 +324,10 @@ def _create_pygments_plugin() -> Any:
             if info:
                 # Language hint provided, use Pygments
                 lang = info.split()[0] if info else ""
-                # Default to plain text lexer
-                lexer: Lexer = TextLexer()
-                try:
-                    lexer = get_lexer_by_name(lang, stripall=False)
-                except ClassNotFound:
-                    pass  # Already have default
-
-                formatter: Formatter = HtmlFormatter(
-                    linenos=False,  # No line numbers in markdown code blocks
-                    cssclass="highlight",
-                    wrapcode=True,
-                )
+                lexer = lexer_for(lang)
                 # Track Pygments timing if enabled
                 with timing_stat("_pygments_timings"):
-                    return str(highlight(code, lexer, formatter))
+                    return str(highlight(code, lexer, shared_formatter))
             else:
                 # No language hint, use default rendering
                 return original_render(code, info)
@@ -258,10 +355,24 @@ def _get_markdown_renderer() -> mistune.Markdown:
     )
 
 
+@functools.lru_cache(maxsize=2048)
+def _render_markdown_cached(text: str) -> str:
+    """Cached mistune render for small fragments.
+
+    Repeated snippets (checkbox lists, boilerplate explanations) are common
+    in transcripts and mistune rendering is pure-functional on its input.
+    """
+    renderer = _get_markdown_renderer()
+    return str(renderer(text))
+
+
 def render_markdown(text: str) -> str:
     """Convert markdown text to HTML using mistune with Pygments syntax highlighting."""
     # Track markdown rendering time if enabled
     with timing_stat("_markdown_timings"):
+        # Large one-off documents bypass the cache to bound its memory
+        if len(text) < 16 * 1024:
+            return _render_markdown_cached(text)
         renderer = _get_markdown_renderer()
         return str(renderer(text))
 
@@ -269,6 +380,15 @@ def render_markdown(text: str) -> str:
 # -- Collapsible Content Rendering --------------------------------------------
 
 
+def _count_lines(text: str) -> int:
+    """Count lines without materializing the list splitlines() would build.
+
+    Matches len(text.splitlines()) for LF-terminated text, which is all the
+    threshold checks need.
+    """
+    return text.count("\n") + (1 if text and not text.endswith("\n") else 0)
+
+
 def render_collapsible_code(
     preview_html: str,
     full_html: str,
@@ -289,16 +409,21 @@ def render_collapsible_code(
     Returns:
         HTML string with collapsible details element
     """
+    # Compact single-line markup: the inter-tag whitespace of a multi-line
+    # template would be shipped verbatim in every collapsible block
     markdown_class = " markdown" if is_markdown else ""
-    return f"""<details class='collapsible-code'>
-        <summary>
-            <span class='line-count'>{line_count} lines</span>
-            <div class='preview-content{markdown_class}'>{preview_html}</div>
-        </summary>
-        <div class='code-full{markdown_class}'>{full_html}</div>
-    </details>"""
+    return (
+        f"<details class='collapsible-code'>"
+        f"<summary>"
+        f"<span class='line-count'>{line_count} lines</span>"
+        f"<div class='preview-content{markdown_class}'>{preview_html}</div>"
+        f"</summary>"
+        f"<div class='code-full{markdown_class}'>{full_html}</div>"
+        f"</details>"
+    )
 
 
+@functools.lru_cache(maxsize=2048)
 def render_markdown_collapsible(
     raw_content: str,
     css_class: str,
@@ -310,6 +435,10 @@ def render_markdown_collapsible(
     For long content, creates a collapsible details element with a preview.
     For short content, renders inline with the specified CSS class.
 
+    Results are memoized: transcripts frequently repeat identical snippets
+    (boilerplate, re-rendered thinking fragments), and the markdown engine is
+    by far the most expensive part of this call.
+
     Args:
         raw_content: The raw text content to render as markdown
         css_class: CSS class for the wrapper div (e.g., "task-prompt", "task-result")
@@ -321,21 +450,22 @@ def render_markdown_collapsible(
     """
     rendered_html = render_markdown(raw_content)
 
-    lines = raw_content.splitlines()
-    if len(lines) <= line_threshold:
+    line_count = _count_lines(raw_content)
+    if line_count <= line_threshold:
         # Short content, show inline
         return f'<div class="{css_class} markdown">{rendered_html}</div>'
 
-    # Long content - make collapsible with rendered preview
-    preview_lines = lines[:preview_line_count]
+    # Long content - make collapsible with rendered preview; only this branch
+    # pays for the line list
+    preview_lines = raw_content.splitlines()[:preview_line_count]
     preview_text = "\n".join(preview_lines)
-    if len(lines) > preview_line_count:
+    if line_count > preview_line_count:
         preview_text += "\n\n..."
     # Render truncated markdown (produces valid HTML with proper tag closure)
     preview_html = render_markdown(preview_text)
 
     collapsible = render_collapsible_code(
-        preview_html, rendered_html, len(lines), is_markdown=True
+        preview_html, rendered_html, line_count, is_markdown=True
     )
     return f'<div class="{css_class}">{collapsible}</div>'
 
@@ -397,31 +527,32 @@ def render_file_content_collapsible(
 # -- Template Environment -----------------------------------------------------
 
 
+# Emoji ranges checked by starts_with_emoji, with contiguous blocks merged:
+# - Misc Symbols + Dingbats: U+2600 - U+27BF
+# - Misc Symbols and Pictographs + Emoticons: U+1F300 - U+1F64F
+# - Transport and Map Symbols: U+1F680 - U+1F6FF
+# - Supplemental Symbols: U+1F900 - U+1F9FF
+# Kept as parallel sorted tuples so a single bisect probe replaces the
+# chained range comparisons
+_EMOJI_RANGE_STARTS = (0x2600, 0x1F300, 0x1F680, 0x1F900)
+_EMOJI_RANGE_ENDS = (0x27BF, 0x1F64F, 0x1F6FF, 0x1F9FF)
+
+
 def starts_with_emoji(text: str) -> bool:
     """Check if a string starts with an emoji character.
 
-    Checks common emoji Unicode ranges:
-    - Emoticons: U+1F600 - U+1F64F
-    - Misc Symbols and Pictographs: U+1F300 - U+1F5FF
-    - Transport and Map Symbols: U+1F680 - U+1F6FF
-    - Supplemental Symbols: U+1F900 - U+1F9FF
-    - Misc Symbols: U+2600 - U+26FF
-    - Dingbats: U+2700 - U+27BF
+    Checks the common emoji Unicode ranges listed in _EMOJI_RANGE_STARTS.
     """
     if not text:
         return False
 
-    first_char = text[0]
-    code_point = ord(first_char)
+    code_point = ord(text[0])
+    if code_point < 0x2600:
+        # Covers all ASCII/Latin text, the overwhelmingly common case
+        return False
 
-    return (
-        0x1F600 <= code_point <= 0x1F64F  # Emoticons
-        or 0x1F300 <= code_point <= 0x1F5FF  # Misc Symbols and Pictographs
-        or 0x1F680 <= code_point <= 0x1F6FF  # Transport and Map Symbols
-        or 0x1F900 <= code_point <= 0x1F9FF  # Supplemental Symbols
-        or 0x2600 <= code_point <= 0x26FF  # Misc Symbols
-        or 0x2700 <= code_point <= 0x27BF  # Dingbats
-    )
+    idx = bisect.bisect_right(_EMOJI_RANGE_STARTS, code_point) - 1
+    return code_point <= _EMOJI_RANGE_ENDS[idx]
 
 
 @functools.lru_cache(maxsize=1)
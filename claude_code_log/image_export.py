@@ -4,14 +4,36 @@ This module provides format-agnostic image export functionality that can be used
 by both HTML and Markdown renderers.
 """
 
-import base64
 import binascii
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+try:
+    # SIMD-accelerated drop-in replacement; worthwhile for multi-MB
+    # screenshot payloads but not required
+    from pybase64 import b64decode as _b64decode
+except ImportError:
+    # base64.b64decode is a thin wrapper over this; calling it directly
+    # skips the per-chunk wrapper frame. Same non-strict parsing, same
+    # binascii.Error on malformed input.
+    _b64decode = binascii.a2b_base64
+
 if TYPE_CHECKING:
     from .models import ImageContent
 
+# Base64 chars decoded per write in referenced mode; multiple of 4 so every
+# chunk is a whole number of base64 groups
+_B64_CHUNK = 1 << 20
+
+# Bound %-formatter: skips re-parsing the format spec per filename
+_FILENAME_TMPL = "image_%04d%s".__mod__
+
+# Below this, thread-pool startup costs more than it saves
+_BATCH_PARALLEL_MIN = 4
+
 
 def export_image(
     image: "ImageContent",
@@ -40,43 +62,181 @@ def export_image(
         return None
 
     if mode == "embedded":
-        return f"data:{image.source.media_type};base64,{image.source.data}"
+        # Built once per image instance; repeated renders of the same image
+        # reuse the cached URL instead of re-concatenating a multi-MB string
+        return image.data_url
 
     if mode == "referenced":
         if output_dir is None:
             return None
+        images_dir = _ensure_images_dir(output_dir)
+        if images_dir is None:
+            return None
+        return _write_referenced_image(image, images_dir, counter)
+
+    # Unsupported mode
+    return None
+
+
+def export_images_batch(
+    images: "list[ImageContent]",
+    output_dir: Path,
+    start_counter: int = 0,
+) -> list[str | None]:
+    """Export many images in referenced mode with one directory setup.
+
+    Runs the images-subdirectory creation once instead of per image, then
+    writes each payload in turn; filenames are numbered from start_counter.
+
+    Larger batches decode and write on a small thread pool: base64 decode
+    runs in C (releasing the GIL for sizeable inputs) while sibling writes
+    wait on disk, so the stages pipeline. Concurrent tasks may occasionally
+    write a duplicate payload twice before the digest cache catches it;
+    every returned path is still valid.
+
+    Args:
+        images: ImageContent entries with base64-encoded image data
+        output_dir: Output directory the images/ subdirectory goes under
+        start_counter: Counter used for the first image's filename
+
+    Returns:
+        One relative path (or None on failure) per input image, in order
+    """
+    images_dir = _ensure_images_dir(output_dir)
+    if images_dir is None:
+        return [None] * len(images)
+
+    if len(images) < _BATCH_PARALLEL_MIN:
+        return [
+            _write_referenced_image(image, images_dir, start_counter + offset)
+            for offset, image in enumerate(images)
+        ]
+
+    def write_one(pair: "tuple[int, ImageContent]") -> str | None:
+        offset, image = pair
+        return _write_referenced_image(image, images_dir, start_counter + offset)
+
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+        return list(pool.map(write_one, enumerate(images)))
+
 
+# Identical payloads exported to the same directory map to the first copy's
+# relative path
+_image_digest_cache: dict[tuple[str, str], str] = {}
+
+# Directories already created this run; skips the per-image mkdir syscall.
+# Only touched before any worker threads start, so a plain set is fine.
+_created_dirs: set[str] = set()
+
+
+def _ensure_images_dir(output_dir: Path) -> Path | None:
+    """Create the images subdirectory, returning None when that fails."""
+    images_dir = output_dir / "images"
+    key = str(images_dir)
+    if key not in _created_dirs:
         try:
-            # Create images subdirectory
-            images_dir = output_dir / "images"
             images_dir.mkdir(exist_ok=True)
+        except OSError:
+            return None
+        _created_dirs.add(key)
+    return images_dir
 
-            # Generate filename based on media type
-            ext = _get_extension(image.source.media_type)
-            filename = f"image_{counter:04d}{ext}"
-            filepath = images_dir / filename
 
-            # Decode and write image
-            image_data = base64.b64decode(image.source.data)
-            filepath.write_bytes(image_data)
+def _write_referenced_image(
+    image: "ImageContent", images_dir: Path, counter: int
+) -> str | None:
+    """Decode one image into images_dir, returning its relative path.
 
-            return f"images/{filename}"
-        except (OSError, binascii.Error, ValueError):
-            # Graceful degradation: return None to trigger placeholder rendering
-            # Covers: PermissionError (mkdir/write), disk full, malformed base64
-            return None
+    Returns None on decode or write failure so the caller can fall back to
+    placeholder rendering.
+    """
+    data_str = image.source.data
+
+    # The same screenshot is often pasted several times in one transcript;
+    # identical payloads reuse the first copy's file and skip the decode
+    # and write entirely
+    cache_key = (str(images_dir), hashlib.sha256(data_str.encode()).hexdigest())
+    cached_path = _image_digest_cache.get(cache_key)
+    if cached_path is not None:
+        return cached_path
+
+    # Cheap structural pre-check: without whitespace, valid base64 is a
+    # non-empty multiple of 4 chars. Fail fast to placeholder rendering
+    # before creating the file, instead of letting the decoder scan the
+    # whole payload and reject it.
+    has_whitespace = "\n" in data_str or " " in data_str
+    if not has_whitespace and (not data_str or len(data_str) & 3):
+        return None
 
-    # Unsupported mode
-    return None
+    # Generate filename based on media type; none of this can fail, so it
+    # stays outside the exception scopes below
+    ext = _get_extension(image.source.media_type)
+    filename = _FILENAME_TMPL((counter, ext))
+    filepath = images_dir / filename
+
+    # Raw fd write: skips the io.FileIO/BufferedWriter stack that
+    # Path.open builds per image
+    try:
+        fd = os.open(os.fspath(filepath), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    except OSError:
+        # Graceful degradation: placeholder rendering (e.g. PermissionError)
+        return None
+
+    # Decode and write in bounded chunks so the full decoded bytes never
+    # live alongside the base64 string; halves peak memory for multi-MB
+    # screenshots. Chunked decoding needs 4-char group alignment, so
+    # whitespace-bearing payloads take the whole-string path (b64decode
+    # discards whitespace, chunk slicing would not).
+    try:
+        if has_whitespace or len(data_str) <= _B64_CHUNK:
+            _write_all(fd, _b64decode(data_str))
+        else:
+            for i in range(0, len(data_str), _B64_CHUNK):
+                _write_all(fd, _b64decode(data_str[i : i + _B64_CHUNK]))
+    except (binascii.Error, ValueError):
+        # Malformed base64: don't leave a truncated image behind
+        os.close(fd)
+        try:
+            filepath.unlink(missing_ok=True)
+        except OSError:
+            pass
+        return None
+    except OSError:
+        # Write failure (disk full etc.)
+        os.close(fd)
+        return None
+    os.close(fd)
+
+    rel_path = f"images/{filename}"
+    _image_digest_cache[cache_key] = rel_path
+    return rel_path
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write data to fd in full, looping on partial writes."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
 
 
 def _get_extension(media_type: str) -> str:
-    """Get file extension from media type."""
-    ext_map = {
-        "image/png": ".png",
-        "image/jpeg": ".jpg",
-        "image/gif": ".gif",
-        "image/webp": ".webp",
-        "image/svg+xml": ".svg",
-    }
-    return ext_map.get(media_type, ".png")
+    """Get file extension from media type.
+
+    Chained equality instead of a dict: five candidates don't justify
+    hashing the string, and PNG -- by far the most common clipboard
+    format -- is checked first.
+    """
+    return (
+        ".png"
+        if media_type == "image/png"
+        else ".jpg"
+        if media_type == "image/jpeg"
+        else ".gif"
+        if media_type == "image/gif"
+        else ".webp"
+        if media_type == "image/webp"
+        else ".svg"
+        if media_type == "image/svg+xml"
+        else ".png"
+    )
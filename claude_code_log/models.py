@@ -2,6 +2,7 @@
 
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import cached_property
 from typing import Any, Union, Optional, Literal
 
 from pydantic import BaseModel, Field
@@ -78,6 +79,15 @@ class ImageContent(BaseModel):
     type: Literal["image"]
     source: ImageSource
 
+    @cached_property
+    def data_url(self) -> str:
+        """Embedded-mode data URL, built once per image instance.
+
+        The same image is often rendered several times in a transcript; the
+        concatenation allocates media_type + payload bytes, so cache it.
+        """
+        return "data:" + self.source.media_type + ";base64," + self.source.data
+
 
 class UsageInfo(BaseModel):
     """Token usage information for tracking API consumption."""
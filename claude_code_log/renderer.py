@@ -8,7 +8,7 @@ import re
 import time
 from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Optional, Tuple, cast
+from typing import TYPE_CHECKING, Any, Callable, Optional, Tuple, cast
 from datetime import datetime
 
 if TYPE_CHECKING:
@@ -78,6 +78,12 @@ from .renderer_timings import (
 )
 
 
+# Single-pass translation tables; each avoids a chain of str.replace calls
+# that would walk (and reallocate) the string once per substitution
+_ATTR_ESCAPE_TABLE = str.maketrans({"&": "&amp;", '"': "&quot;"})
+_TYPE_TO_TITLE_TABLE = str.maketrans({"_": " ", "-": " "})
+
+
 # -- Rendering Context --------------------------------------------------------
 
 
@@ -285,7 +291,7 @@ class TemplateMessage:
         tool_id = self.tool_use_id
         if tool_id:
             # Escape for HTML attribute
-            escaped = tool_id.replace("&", "&amp;").replace('"', "&quot;")
+            escaped = tool_id.translate(_ATTR_ESCAPE_TABLE)
             return f"ID: {escaped}"
         return None
 
@@ -2066,23 +2072,39 @@ class Renderer:
     - Subclasses override methods to implement format-specific rendering
     """
 
-    def _dispatch_format(self, obj: Any, message: TemplateMessage) -> str:
-        """Dispatch to format_{ClassName}(obj, message) based on object type."""
-        for cls in type(obj).__mro__:
+    def __init__(self) -> None:
+        # Resolved format_/title_ methods keyed by concrete content type, so
+        # the MRO walk and per-call f-string + getattr probing happen once per
+        # type instead of once per message. None records "no handler".
+        self._format_methods: dict[type, Optional[Callable[..., str]]] = {}
+        self._title_methods: dict[type, Optional[Callable[..., Optional[str]]]] = {}
+
+    def _resolve_method(self, prefix: str, tp: type) -> Optional[Callable[..., Any]]:
+        """Find the most specific {prefix}{ClassName} method for a type's MRO."""
+        for cls in tp.__mro__:
             if cls is object:
                 break
-            if method := getattr(self, f"format_{cls.__name__}", None):
-                return method(obj, message)
-        return ""
+            if method := getattr(self, f"{prefix}{cls.__name__}", None):
+                return method
+        return None
+
+    def _dispatch_format(self, obj: Any, message: TemplateMessage) -> str:
+        """Dispatch to format_{ClassName}(obj, message) based on object type."""
+        tp = type(obj)
+        try:
+            method = self._format_methods[tp]
+        except KeyError:
+            method = self._format_methods[tp] = self._resolve_method("format_", tp)
+        return method(obj, message) if method is not None else ""
 
     def _dispatch_title(self, obj: Any, message: TemplateMessage) -> Optional[str]:
         """Dispatch to title_{ClassName}(obj, message) based on object type."""
-        for cls in type(obj).__mro__:
-            if cls is object:
-                break
-            if method := getattr(self, f"title_{cls.__name__}", None):
-                return method(obj, message)
-        return None
+        tp = type(obj)
+        try:
+            method = self._title_methods[tp]
+        except KeyError:
+            method = self._title_methods[tp] = self._resolve_method("title_", tp)
+        return method(obj, message) if method is not None else None
 
     def format_content(self, message: TemplateMessage) -> str:
         """Format message content by dispatching to type-specific method.
@@ -2111,13 +2133,10 @@ class Renderer:
             Title string for the message header.
         """
         # Try title_{ClassName} dispatch
-        for cls in type(message.content).__mro__:
-            if cls is object:
-                break
-            if method := getattr(self, f"title_{cls.__name__}", None):
-                return method(message.content, message)
+        if (title := self._dispatch_title(message.content, message)) is not None:
+            return title
         # Fallback: convert message_type to title case
-        return message.content.message_type.replace("_", " ").replace("-", " ").title()
+        return message.content.message_type.translate(_TYPE_TO_TITLE_TABLE).title()
 
     # -------------------------------------------------------------------------
     # Title Methods (return title strings for message headers)
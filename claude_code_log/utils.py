@@ -228,6 +228,16 @@ def extract_working_directories(
 
 # IDE tag patterns imported from factories for compact preview rendering
 
+# Absolute path inside IDE tag content; stops at whitespace, colon followed
+# by whitespace, or "in the IDE"
+_IDE_ABSOLUTE_PATH_PATTERN = re.compile(
+    r"(/[^\s:]+(?:\.[^\s:]+)?)(?::\s|\s+in\s+the\s+IDE|\s*$|\s)"
+)
+# Fallback: "file" or "from" followed by a path
+_IDE_FILE_FROM_PATH_PATTERN = re.compile(r"(?:file|from)\s+(/[^\s:]+)")
+# Compiled pattern for bash-input (not in parser.py as it's preview-specific)
+_BASH_INPUT_PREVIEW_PATTERN = re.compile(r"<bash-input>(.*?)</bash-input>", re.DOTALL)
+
 
 def _compact_ide_tags_for_preview(text_content: str) -> str:
     """Replace verbose IDE/system tags with compact emoji indicators for previews.
@@ -251,15 +261,12 @@ def _compact_ide_tags_for_preview(text_content: str) -> str:
     def _extract_file_path(content: str) -> str | None:
         """Extract file path from IDE tag content."""
         # Try to find an absolute path (starts with /)
-        # Stop at: whitespace, colon followed by newline, or "in the IDE"
-        path_match = re.search(
-            r"(/[^\s:]+(?:\.[^\s:]+)?)(?::\s|\s+in\s+the\s+IDE|\s*$|\s)", content
-        )
+        path_match = _IDE_ABSOLUTE_PATH_PATTERN.search(content)
         if path_match:
             return path_match.group(1).rstrip(".:")
 
         # Fallback: look for "file" or "from" followed by a path
-        path_match = re.search(r"(?:file|from)\s+(/[^\s:]+)", content)
+        path_match = _IDE_FILE_FROM_PATH_PATTERN.search(content)
         if path_match:
             return path_match.group(1).rstrip(".:")
 
@@ -271,9 +278,6 @@ def _compact_ide_tags_for_preview(text_content: str) -> str:
     compact_parts: list[str] = []
     remaining = text_content
 
-    # Compiled pattern for bash-input (not in parser.py as it's preview-specific)
-    bash_input_pattern = re.compile(r"<bash-input>(.*?)</bash-input>", re.DOTALL)
-
     while remaining:
         # Strip leading whitespace for matching
         stripped = remaining.lstrip()
@@ -305,7 +309,7 @@ def _compact_ide_tags_for_preview(text_content: str) -> str:
             continue
 
         # Check for <bash-input>command</bash-input> at start
-        match = bash_input_pattern.match(stripped)
+        match = _BASH_INPUT_PREVIEW_PATTERN.match(stripped)
         if match:
             command = match.group(1).strip()
             # Truncate very long commands
@@ -364,6 +368,11 @@ def get_warmup_session_ids(messages: list[TranscriptEntry]) -> set[str]:
     return warmup_sessions
 
 
+_TOOL_USE_ERROR_PATTERN = re.compile(
+    r"<tool_use_error>(.*?)</tool_use_error>", re.DOTALL
+)
+
+
 def strip_error_tags(text: str) -> str:
     """Strip <tool_use_error>...</tool_use_error> tags, keeping content.
 
@@ -376,12 +385,7 @@ def strip_error_tags(text: str) -> str:
     Returns:
         Text with error tags removed but content preserved
     """
-    return re.sub(
-        r"<tool_use_error>(.*?)</tool_use_error>",
-        r"\1",
-        text,
-        flags=re.DOTALL,
-    )
+    return _TOOL_USE_ERROR_PATTERN.sub(r"\1", text)
 
 
 def generate_unified_diff(old_string: str, new_string: str) -> str: